@@ -1,16 +1,19 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks
-from typing import List
+from fastapi import APIRouter, UploadFile, File, HTTPException, Query
+from typing import List, Optional
 import shutil
 import os
+import asyncio
 from tempfile import NamedTemporaryFile
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader, CSVLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from app.services.ai_engine import ai_engine
 from app.schemas import SystemConfig
 from pydantic import BaseModel
 import json
 from app.core.config import settings
 from app.services.style_service import style_service
+from app.services.executor import blocking_executor
+from app.services.ticket_store import ticket_store
+from app.services.ingestion import ingestion_pipeline
+from app.api.endpoints.ingest import sse_event
 from fastapi.responses import FileResponse, StreamingResponse
 import io
 import csv
@@ -25,115 +28,177 @@ class EvalRequest(BaseModel):
 async def evaluate_text(req: EvalRequest):
     return style_service.evaluate_similarity(req.text1, req.text2)
 
-async def process_file_background(temp_path: str, filename: str):
-    try:
-        suffix = os.path.splitext(filename)[1]
-        loader = None
-        
-        if suffix.lower() == ".pdf":
-            loader = PyPDFLoader(temp_path)
-        elif suffix.lower() in [".docx", ".doc"]:
-            loader = Docx2txtLoader(temp_path)
-        elif suffix.lower() == ".txt":
-            loader = TextLoader(temp_path)
-        elif suffix.lower() == ".csv":
-            loader = CSVLoader(temp_path, encoding='utf-8')
-        
-        if loader:
-            docs = loader.load()
-            for d in docs:
-                d.metadata["source"] = filename
-                
-            splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-            chunks = splitter.split_documents(docs)
-            if chunks:
-                await ai_engine.add_documents(chunks)
-                print(f"Background: Successfully processed {len(chunks)} chunks from {filename}")
-    except Exception as e:
-        print(f"Background: Error processing {filename}: {e}")
-    finally:
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-
 @router.post("/upload-document")
-async def upload_document(background_tasks: BackgroundTasks, files: List[UploadFile] = File(...)):
+async def upload_document(files: List[UploadFile] = File(...)):
+    staged = []
     for file in files:
         if file.filename:
             suffix = os.path.splitext(file.filename)[1]
             with NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
                 shutil.copyfileobj(file.file, tmp)
                 tmp_path = tmp.name
-            
-            background_tasks.add_task(process_file_background, tmp_path, file.filename)
+            staged.append((tmp_path, file.filename))
     
-    return {"message": "Uploads accepted. Processing started in background."}
+    job = await ingestion_pipeline.submit(staged)
+    return {"message": "Uploads accepted. Processing started in background.", "job_id": job.id}
+
+@router.get("/ingest-jobs")
+async def list_ingest_jobs():
+    return {
+        "jobs": [job.snapshot() for job in reversed(ingestion_pipeline.jobs.values())],
+        "pipeline": ingestion_pipeline.snapshot()
+    }
+
+@router.get("/ingest-jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    job = ingestion_pipeline.jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.snapshot()
+
+@router.get("/ingest-jobs/{job_id}/events")
+async def stream_ingest_job(job_id: str):
+    job = ingestion_pipeline.jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        while True:
+            changed = job.changed
+            snapshot = job.snapshot()
+            yield sse_event("progress", snapshot)
+            if snapshot["finished_at"] is not None:
+                yield sse_event("done", snapshot)
+                return
+            # At most ~4 updates a second, and at least one a second for the ETA.
+            await asyncio.sleep(0.25)
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=1)
+            except asyncio.TimeoutError:
+                pass
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/documents/ingest-report")
+async def get_ingest_report():
+    return ai_engine.ingest_stats()
 
 @router.get("/documents")
 async def list_documents():
-    docs = await ai_engine.list_documents()
-    return {"documents": docs}
+    details = await ai_engine.document_details()
+    return {"documents": [d["source"] for d in details], "details": details}
 
 @router.delete("/documents/{filename}")
 async def delete_document(filename: str):
     await ai_engine.delete_document(filename)
     return {"message": f"Deleted {filename}"}
 
-@router.get("/analytics")
-async def get_analytics(source: str = None):
-    FEEDBACK_FILE = "feedback.json"
-    if not os.path.exists(FEEDBACK_FILE):
-          return {
-            "auto_resolution_rate": 0,
-            "average_response_time": "0s",
-            "total_tickets": 0
-        }
-    
-    with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
+def _analytics(source: str = None, range_key: str = "all") -> dict:
+    filters = {}
     if source:
         if source == "playground":
-             data = [d for d in data if d.get("source") == "playground"]
+             filters["source"] = "playground"
         else:
-             data = [d for d in data if d.get("source") != "playground"]
+             filters["source_not"] = "playground"
 
-    total = len(data)
+    summary = ticket_store.analytics_summary(range_key, **filters)
+    total = summary["total"]
     if total == 0:
          return {
             "auto_resolution_rate": 0,
             "average_response_time": "0s",
-            "total_tickets": 0
+            "total_tickets": 0,
+            "range": range_key
         }
 
-    auto_resolved = sum(1 for d in data if d.get("result", {}).get("action") == "auto_reply")
-    spam = sum(1 for d in data if d.get("result", {}).get("action") == "spam")
+    auto_resolved = summary["by_action"].get("auto_reply", 0)
+    spam = summary["by_action"].get("spam", 0)
     rate = round(((auto_resolved + spam) / total) * 100, 1)
 
-    recent = data[-5:][::-1]
+    # Only the newest few entries are read; they are then clipped to the range.
+    since = summary["since"] or 0
+    recent = [d for d in ticket_store.list(limit=5, newest_first=True, **filters) if d.get("timestamp", 0) >= since]
     
-    issues = [d for d in data if d.get("rating") == "dislike" or d.get("result", {}).get("action") == "create_ticket"]
-    top_issues = issues[-5:][::-1]
+    issues = ticket_store.list(limit=5, newest_first=True, rating="dislike", **filters)
+    issues += ticket_store.list(limit=5, newest_first=True, action="create_ticket", **filters)
+    issues = [d for d in issues if d.get("timestamp", 0) >= since]
+    top_issues = sorted({d["id"]: d for d in issues}.values(), key=lambda d: d.get("timestamp", 0), reverse=True)[:5]
+
+    response_time = summary["response_time"]
+    average = f"{response_time['avg_ms'] / 1000:.1f}s" if response_time["count"] else "n/a"
     
     return {
         "auto_resolution_rate": rate,
-        "average_response_time": "0.8s",
+        "average_response_time": average,
+        "response_time": response_time,
         "total_tickets": total,
+        "by_source": summary["by_source"],
+        "by_action": summary["by_action"],
+        "timeline": summary["timeline"],
+        "granularity": summary["granularity"],
+        "range": range_key,
         "recent_activity": recent,
         "top_issues": top_issues
     }
 
+@router.get("/analytics")
+async def get_analytics(source: str = None, range: str = "all"):
+    try:
+        return await blocking_executor.run("ticket_store", _analytics, source, range)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/metrics")
+async def get_metrics():
+    from app.services.telegram_bot import telegram_service
+    from app.services.translation import translation_service
+    from app.services.email_bot import email_service
+    return {
+        "executor": blocking_executor.snapshot(),
+        "batching": ai_engine.batching_stats(),
+        "answer_cache": ai_engine.answer_cache.snapshot(),
+        "fast_classifier": ai_engine.fast_classifier.snapshot(),
+        "speculative_retrieval": ai_engine.speculation.snapshot(),
+        "time_to_first_token": ai_engine.time_to_first_token.snapshot(),
+        "telegram": telegram_service.snapshot(),
+        "translation": translation_service.snapshot(),
+        "email": email_service.snapshot()
+    }
+
 @router.get("/settings", response_model=SystemConfig)
 async def get_settings():
     return ai_engine.config
 
 @router.post("/settings")
 async def update_settings(config: SystemConfig):
-    ai_engine.config = config
+    previous = ai_engine.config
+    reloading = await ai_engine.reload_models(config)
     ai_engine.save_config()
-    
-    ai_engine.reload_models(config)
-    
-    return {"message": "Settings updated, saved, and applied."}
+
+    telegram_fields = (
+        "telegram_token", "telegram_enabled", "telegram_max_concurrency", "telegram_chat_backlog", "telegram_chat_overflow",
+        "telegram_mode", "telegram_webhook_url", "telegram_webhook_secret", "telegram_api_base_url",
+    )
+    if any(getattr(previous, f) != getattr(config, f) for f in telegram_fields):
+        from app.services.telegram_bot import telegram_service
+        asyncio.create_task(telegram_service.restart())
+
+    email_fields = ("gmail_email", "gmail_password", "gmail_enabled", "gmail_imap_host", "gmail_imap_port", "gmail_imap_ssl")
+    if any(getattr(previous, f) != getattr(config, f) for f in email_fields):
+        from app.services.email_bot import email_service
+        email_service.restart()
+
+    if reloading:
+        return {"message": f"Settings saved. Reloading {', '.join(reloading)} in the background.", "reloading": reloading}
+    return {"message": "Settings updated, saved, and applied.", "reloading": []}
+
+@router.get("/settings/reload-status")
+async def get_reload_status():
+    return ai_engine.reload_status
 
 class AnalyzeRequest(BaseModel):
     text: str
@@ -142,73 +207,123 @@ class AnalyzeRequest(BaseModel):
 async def analyze_style(req: AnalyzeRequest):
     return style_service.analyze_style(req.text)
 
+MAX_PAGE_SIZE = 200
+
+async def _ticket_page(cursor: Optional[str], limit: int, newest_first: bool, **filters) -> dict:
+    try:
+        after = int(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    filters = {k: v for k, v in filters.items() if v not in (None, "")}
+    if filters.get("rating") == "unrated":
+        del filters["rating"]
+        filters["unrated"] = True
+    items, next_cursor = await blocking_executor.run(
+        "ticket_store", ticket_store.page, limit, after, newest_first, **filters
+    )
+    return {"items": items, "next_cursor": str(next_cursor) if next_cursor is not None else None}
+
 @router.get("/feedback")
-async def get_feedback():
-    FEEDBACK_FILE = "feedback.json"
-    if os.path.exists(FEEDBACK_FILE):
-        with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+async def get_feedback(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    source: Optional[str] = None,
+    status: Optional[str] = None,
+    rating: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    q: Optional[str] = None,
+):
+    """Newest first. Pass next_cursor back as cursor for the following page."""
+    return await _ticket_page(
+        cursor, limit, True, source=source, status=status, rating=rating, since=since, until=until, q=q
+    )
 
 class RateRequest(BaseModel):
     rating: str
 
-@router.post("/feedback/{index}/rate")
-async def rate_feedback(index: int, req: RateRequest):
-    FEEDBACK_FILE = "feedback.json"
-    if not os.path.exists(FEEDBACK_FILE):
-        raise HTTPException(status_code=404, detail="No feedback found")
-    
-    with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    if 0 <= index < len(data):
-        data[index]["rating"] = req.rating
-        with open(FEEDBACK_FILE, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        return {"message": "Rated"}
-    
-    raise HTTPException(status_code=404, detail="Index out of bounds")
+@router.post("/feedback/{entry_id}/rate")
+async def rate_feedback(entry_id: str, req: RateRequest):
+    entry = await blocking_executor.run("ticket_store", ticket_store.update, entry_id, {"rating": req.rating})
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Feedback entry not found")
+    return {"message": "Rated"}
 
 @router.delete("/feedback/all")
 async def delete_all_feedback():
-    FEEDBACK_FILE = "feedback.json"
-    if os.path.exists(FEEDBACK_FILE):
-        try:
-            os.remove(FEEDBACK_FILE)
-            return {"message": "All feedback cleared"}
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to delete feedback: {e}")
-    return {"message": "No feedback to delete"}
+    try:
+        await blocking_executor.run("ticket_store", ticket_store.clear)
+        return {"message": "All feedback cleared"}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete feedback: {e}")
+
+EXPORT_COLUMNS = {
+    "id": lambda d: d.get("id"),
+    "timestamp": lambda d: d.get("timestamp"),
+    "text": lambda d: d.get("text"),
+    "source": lambda d: d.get("source"),
+    "status": lambda d: d.get("status"),
+    "action": lambda d: (d.get("result") or {}).get("action"),
+    "response": lambda d: (d.get("result") or {}).get("response"),
+    "classification": lambda d: (d.get("result") or {}).get("classification"),
+    "rating": lambda d: d.get("rating"),
+    "latency_ms": lambda d: d.get("latency_ms"),
+    "contact_info": lambda d: d.get("contact_info"),
+    "translations": lambda d: d.get("translations"),
+}
+DEFAULT_CSV_COLUMNS = ["timestamp", "text", "source", "action", "response", "rating"]
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+def _export_rows(fmt: str, columns: Optional[list], filters: dict):
+    # Runs in Starlette's threadpool; each batch is a separate short query, so
+    # memory stays at one batch and the first bytes go out immediately.
+    if fmt == "csv":
+        columns = columns or DEFAULT_CSV_COLUMNS
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(columns)
+        yield "\ufeff" + output.getvalue()
+        for batch in ticket_store.scan(**filters):
+            output.seek(0)
+            output.truncate()
+            writer.writerows([[_csv_value(EXPORT_COLUMNS[c](d)) for c in columns] for d in batch])
+            yield output.getvalue()
+    else:
+        for batch in ticket_store.scan(**filters):
+            if columns:
+                batch = [{c: EXPORT_COLUMNS[c](d) for c in columns} for d in batch]
+            yield "".join(json.dumps(d, ensure_ascii=False) + "\n" for d in batch)
 
 @router.get("/feedback/download")
-async def download_feedback():
-    FEEDBACK_FILE = "feedback.json"
-    if not os.path.exists(FEEDBACK_FILE):
+async def download_feedback(
+    format: str = Query("csv", pattern="^(csv|jsonl)$"),
+    columns: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    source: Optional[str] = None,
+    status: Optional[str] = None,
+):
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    unknown = [c for c in selected or [] if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}. Available: {', '.join(EXPORT_COLUMNS)}")
+
+    filters = {k: v for k, v in {"since": since, "until": until, "source": source, "status": status}.items() if v is not None}
+    first, _ = await blocking_executor.run("ticket_store", ticket_store.page, 1, None, False, **filters)
+    if not first:
         return {"error": "No data"}
-        
-    with open(FEEDBACK_FILE, "r") as f:
-        data = json.load(f)
-        
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["timestamp", "text", "source", "action", "response", "rating"])
-    
-    for d in data:
-        writer.writerow([
-            d.get("timestamp", ""),
-            d.get("text", ""),
-            d.get("source", ""),
-            d.get("result", {}).get("action", ""),
-            d.get("result", {}).get("response", ""),
-            d.get("rating", "")
-        ])
-        
-    output.seek(0)
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
     return StreamingResponse(
-        io.BytesIO(output.getvalue().encode('utf-8-sig')),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=feedback.csv"}
+        (chunk.encode("utf-8") for chunk in _export_rows(format, selected, filters)),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=feedback.{format}"}
     )
 
 class ChunkUpdate(BaseModel):
@@ -230,14 +345,7 @@ class OperatorReplyRequest(BaseModel):
 
 @router.post("/operator/reply")
 async def operator_reply(req: OperatorReplyRequest):
-    FEEDBACK_FILE = "feedback.json"
-    if not os.path.exists(FEEDBACK_FILE):
-        raise HTTPException(status_code=404, detail="No tickets found")
-    
-    with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    
-    ticket = next((d for d in data if d.get("id") == req.ticket_id), None)
+    ticket = await blocking_executor.run("ticket_store", ticket_store.get, req.ticket_id)
     if not ticket:
         raise HTTPException(status_code=404, detail="Ticket not found")
         
@@ -253,22 +361,19 @@ async def operator_reply(req: OperatorReplyRequest):
         subject = "Support Reply"
         if "Subject:" in ticket["text"]:
             subject = "Re: " + ticket["text"].split("\n")[0].replace("Subject:", "").strip()
-        email_service.send_reply(contact["email"], subject, req.reply_text)
-    
-    ticket["status"] = "resolved"
-    ticket["result"]["response"] = req.reply_text
-    ticket["result"]["action"] = "operator_reply"
+        await email_service.reply(contact["email"], subject, req.reply_text)
     
-    with open(FEEDBACK_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+    result = dict(ticket["result"], response=req.reply_text, action="operator_reply")
+    await blocking_executor.run("ticket_store", ticket_store.update, req.ticket_id, {"status": "resolved", "result": result})
         
     return {"message": "Reply sent and ticket resolved"}
 
 @router.get("/operator/tickets")
-async def get_pending_tickets():
-    FEEDBACK_FILE = "feedback.json"
-    if not os.path.exists(FEEDBACK_FILE): 
-        return []
-    with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return [d for d in data if d.get("status") == "pending"]
+async def get_pending_tickets(
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    source: Optional[str] = None,
+    q: Optional[str] = None,
+):
+    """Pending tickets, oldest first."""
+    return await _ticket_page(cursor, limit, False, status="pending", source=source, q=q)
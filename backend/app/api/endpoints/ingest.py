@@ -1,11 +1,13 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Header, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from typing import Optional
 import time
 import uuid
-import os
 import json
 from app.services.ai_engine import ai_engine
+from app.services.executor import blocking_executor
+from app.services.ticket_store import ticket_store
 
 router = APIRouter()
 
@@ -24,29 +26,69 @@ class LogEntry(BaseModel):
     status: str = "resolved"
     result: dict
     rating: Optional[str] = None
+    latency_ms: Optional[float] = None
 
 async def ingest_log(entry: LogEntry):
-    FEEDBACK_FILE = "feedback.json"
-    existing = []
-    if os.path.exists(FEEDBACK_FILE):
-        try:
-             with open(FEEDBACK_FILE, "r", encoding="utf-8") as f:
-                 existing = json.load(f)
-        except: pass
-    
-    data = entry.dict()
-    existing.append(data)
-    with open(FEEDBACK_FILE, "w", encoding="utf-8") as f:
-        json.dump(existing, f, indent=4, ensure_ascii=False)
+    await blocking_executor.run("ticket_store", ticket_store.append, entry.dict())
 
 @router.post("/message")
 async def ingest_message(request: IngestRequest):
+    started = time.perf_counter()
     result = await ai_engine.process_incoming_request(request.text, request.source)
     
     await ingest_log(LogEntry(
         text=request.text,
         source=request.source,
-        result=result
+        result=result,
+        latency_ms=(time.perf_counter() - started) * 1000
     ))
 
     return result
+
+@router.post("/telegram/webhook")
+async def telegram_webhook(request: Request, x_telegram_bot_api_secret_token: Optional[str] = Header(None)):
+    from app.services.telegram_bot import telegram_service
+
+    if not telegram_service.accepts_webhook:
+        raise HTTPException(status_code=503, detail="Telegram webhook mode is not active")
+    if not telegram_service.check_webhook_secret(x_telegram_bot_api_secret_token):
+        raise HTTPException(status_code=403, detail="Invalid secret token")
+    try:
+        data = await request.json()
+        # Acknowledge right away; the answer is produced from the update queue.
+        telegram_service.enqueue_update(data)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid update")
+    return {"ok": True}
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/message/stream")
+async def ingest_message_stream(request: IngestRequest):
+    async def events():
+        started = time.perf_counter()
+        result = None
+        try:
+            async for event, data in ai_engine.stream_incoming_request(request.text, request.source):
+                if event == "done":
+                    result = data
+                    latency_ms = (time.perf_counter() - started) * 1000
+                yield sse_event(event, data)
+        except Exception as e:
+            print(f"Streaming error: {e}")
+            yield sse_event("error", {"detail": str(e)})
+
+        if result is not None:
+            await ingest_log(LogEntry(
+                text=request.text,
+                source=request.source,
+                result=result,
+                latency_ms=latency_ms
+            ))
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -27,9 +27,44 @@ class Settings(BaseSettings):
     
     DEFAULT_LLM_MODEL: str = "gpt-5-mini"
     EMBEDDING_MODEL: str = "Qwen/Qwen3-Embedding-0.6B"
+
+    INFERENCE_DEVICE: str = "auto"
+    CPU_INT8_QUANTIZATION: bool = True
+    CPU_THREADS: int = 0
     
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_db"
+    BM25_INDEX_DIRECTORY: str = "./chroma_db/bm25"
+    BM25_COMPACT_THRESHOLD: int = 2000
+    DOCUMENT_REGISTRY_PATH: str = "./chroma_db/documents.db"
+
+    INGEST_PARSE_WORKERS: int = 2
+    INGEST_SPLIT_WORKERS: int = 1
+    INGEST_EMBED_WORKERS: int = 2
+    INGEST_WRITE_WORKERS: int = 1
+    INGEST_QUEUE_SIZE: int = 8
+    # Padded tokens per ingestion embedding batch; halved automatically on OOM.
+    INGEST_TOKEN_BUDGET: int = 16384
+    INGEST_MAX_BATCH_SIZE: int = 256
+
+    TICKET_DB_PATH: str = "./data/tickets.db"
+    # Imported into the ticket store once, on first start.
+    LEGACY_FEEDBACK_FILE: str = "feedback.json"
+
+    BLOCKING_POOL_WORKERS: int = 4
+    # "google" (deep_translator) or "local", an offline stand-in for tests.
+    TRANSLATION_BACKEND: str = "google"
+    TRANSLATION_WORKERS: int = 4
+    EMBED_BATCH_SIZE: int = 32
+    EMBED_BATCH_WAIT_MS: float = 5
+    RERANK_BATCH_SIZE: int = 64
+    RERANK_BATCH_WAIT_MS: float = 5
+    # Unix socket of the shared model server (python -m app.services.inference_sidecar);
+    # empty loads the embedding model and reranker in-process.
+    INFERENCE_SIDECAR_SOCKET: str = ""
     
+    EAGER_MODEL_LOADING: bool = True
+    WARMUP_INFERENCE: bool = True
+
     SETTINGS_FILE: str = "settings.json"
 
     model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
@@ -15,8 +15,37 @@ class SystemConfig(BaseModel):
     style_profile: dict = {}
     style_example_text: str = ""
 
+    semantic_cache_enabled: bool = False
+    semantic_cache_threshold: float = 0.92
+    semantic_cache_ttl_seconds: int = 3600
+    semantic_cache_max_entries: int = 1000
+
+    fast_classifier_enabled: bool = False
+    fast_classifier_confidence: float = 0.8
+    fast_classifier_k: int = 7
+    fast_classifier_min_examples: int = 30
+
+    speculative_retrieval_sources: list[str] = []
+
     telegram_token: str = ""
     telegram_enabled: bool = False
+    telegram_max_concurrency: int = 8
+    telegram_chat_backlog: int = 3
+    telegram_chat_overflow: str = "merge"
+    # Post the answer while it is generated and edit it as tokens arrive.
+    telegram_stream_replies: bool = True
+    telegram_edit_interval_ms: int = 1000
+    # "polling" or "webhook"; webhook mode needs a public HTTPS URL that
+    # reaches POST /api/v1/ingest/telegram/webhook.
+    telegram_mode: str = "polling"
+    telegram_webhook_url: str = ""
+    telegram_webhook_secret: str = ""
+    # Bot API endpoint, e.g. a local fake server; empty means api.telegram.org.
+    telegram_api_base_url: str = ""
     gmail_email: str = ""
     gmail_password: str = ""
     gmail_enabled: bool = False
+    gmail_imap_host: str = "imap.gmail.com"
+    gmail_imap_port: int = 993
+    # Off only for local test servers such as aioimaplib's imap_testing_server.
+    gmail_imap_ssl: bool = True
@@ -1,18 +1,34 @@
 import os
 import json
+import time
+import asyncio
+import hashlib
+import threading
+from collections import deque
 from app.core.config import settings
 from app.schemas import SystemConfig
-from langchain_openai import ChatOpenAI
-from langchain_ollama import ChatOllama
-from langchain_community.retrievers import BM25Retriever
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import JsonOutputParser
-from langchain_core.documents import Document
-from sentence_transformers import CrossEncoder
+from app.services.bm25_index import LexicalIndex
+from app.services.document_registry import document_registry
+from app.services.executor import BlockingExecutor, blocking_executor
+from app.services.batching import MicroBatcher
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.fast_classifier import KNNTicketClassifier
+from app.services.speculation import SpeculativeTask, SpeculationStats
+from app.services.metrics import LatencyTracker
+from app.services.model_loader import embed_queries, score_pairs
+from app.services.token_batching import AdaptiveTokenBudget, token_lengths
 
 class AIEngine:
+    MODEL_COMPONENTS = {
+        "llm": ("llm_model",),
+        "embeddings": ("embedding_model",),
+        "reranker": ("reranker_model",),
+    }
+    ANSWER_FIELDS = {
+        "system_prompt", "temperature", "top_k", "max_answer_length", "prefer_small_answers",
+        "enable_critic_loop", "style_method", "style_profile", "style_example_text",
+    }
+
     def __init__(self):
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.CONFIG_FILE = os.path.join(base_dir, "config.json")
@@ -20,11 +36,60 @@ class AIEngine:
         
         self.config = self._load_config()
         
+        # Models, the vector store and the BM25 index are loaded by warmup(),
+        # so importing this module stays cheap.
+        self.ready = False
+        self.startup_error = None
+        self._warmup_task = None
+        self._loaded_config = None
+        self._setup_batchers()
+        self.answer_cache = SemanticAnswerCache()
+        self.fast_classifier = KNNTicketClassifier()
+        self._fast_classifier_task = None
+        self.speculation = SpeculationStats()
+        self.time_to_first_token = LatencyTracker()
+        self.ingest_reports = deque(maxlen=100)
+        self.ingest_budget = AdaptiveTokenBudget(settings.INGEST_TOKEN_BUDGET, settings.INGEST_MAX_BATCH_SIZE)
+        self.embeddings_saved = 0
+        self._configure_cache()
+
+        self.reload_status = {"state": "ready", "components": [], "started_at": None, "finished_at": None, "error": None}
+        self._reload_lock = asyncio.Lock()
+        self._reload_task = None
+
+    async def warmup(self, inference: bool = None):
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._warmup(settings.WARMUP_INFERENCE if inference is None else inference))
+        await asyncio.shield(self._warmup_task)
+
+    async def _warmup(self, inference: bool):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self._setup)
+            if inference:
+                embedding = await self.query_batcher.submit("warmup")
+                await self.rerank_batcher.submit(("warmup", "warmup"))
+                await blocking_executor.run("vector_search", self.vector_store.similarity_search_by_vector, embedding, k=1)
+            self.startup_error = None
+            self.ready = True
+            print(f"AI Engine ready in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            self.startup_error = str(e)
+            self._warmup_task = None
+            print(f"AI Engine startup failed: {e}")
+            raise
+
+    def _setup(self):
         self._setup_models()
         self._setup_vector_db()
         self._setup_bm25()
+        self._setup_registry()
         self._setup_prompts()
 
+    async def ensure_ready(self):
+        if not self.ready:
+            await self.warmup()
+
     def _load_config(self) -> SystemConfig:
         if os.path.exists(self.CONFIG_FILE):
             try:
@@ -44,72 +109,256 @@ class AIEngine:
         with open(self.CONFIG_FILE, "w", encoding="utf-8") as f:
             json.dump(self.config.dict(), f, indent=4, ensure_ascii=False)
 
-    def reload_models(self, new_config: SystemConfig):
+    async def reload_models(self, new_config: SystemConfig) -> list:
+        changed = {f for f in SystemConfig.model_fields if getattr(self.config, f) != getattr(new_config, f)}
+        components = [name for name, fields in self.MODEL_COMPONENTS.items() if changed & set(fields)]
+
         self.config = new_config
-        self._setup_models()
-        self._setup_vector_db()
+        self._configure_cache()
+        if changed & self.ANSWER_FIELDS or components:
+            self.answer_cache.clear()
+        if not self.ready and self._warmup_task is None:
+            # The failed startup is retried with this config on the next request.
+            self.startup_error = None
 
-    def _setup_models(self):
-        if self.config.llm_model.startswith("gpt-5") or self.config.llm_model.startswith("gpt-4"):
-            self.llm = ChatOpenAI(
-                model=self.config.llm_model, 
-                api_key=settings.OPENAI_API_KEY
-            )
-        else:
-            self.llm = ChatOllama(
-                model=self.config.llm_model
-            )
-        
-        print(f"Loading Embeddings: {self.config.embedding_model}")
+        if components:
+            status = {"state": "queued", "components": components, "started_at": None, "finished_at": None, "error": None}
+            self.reload_status = status
+            reload = self._reload_components if self.ready else self._reload_before_ready
+            self._reload_task = asyncio.create_task(reload(components, new_config, status))
+        return components
+
+    async def _reload_before_ready(self, components: list, config: SystemConfig, status: dict):
+        # A startup load may still be running with the previous config; let it
+        # finish, then swap only what it loaded differently.
+        if self._warmup_task is not None:
+            try:
+                await asyncio.shield(self._warmup_task)
+            except Exception:
+                pass
+        if self.ready:
+            loaded = self._loaded_config
+            components = [
+                name for name in components
+                if any(getattr(loaded, f) != getattr(config, f) for f in self.MODEL_COMPONENTS[name])
+            ]
+            if components:
+                await self._reload_components(components, config, status)
+            else:
+                status.update(state="ready", finished_at=time.time())
+            return
+
+        # Startup failed (e.g. a bad model name) or never ran: start over with the new config.
+        self.startup_error = None
+        status.update(state="loading", started_at=time.time())
         try:
-             self.embeddings = HuggingFaceEmbeddings(
-                model_name=self.config.embedding_model,
-                model_kwargs={'device': 'cuda', 'trust_remote_code': True}
-            )
+            await self.warmup()
         except Exception as e:
-            print(f"Failed to load user embedding model {self.config.embedding_model}, falling back to defaults: {e}")
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2",
-                model_kwargs={'device': 'cuda'}
-            )
+            status.update(state="failed", finished_at=time.time(), error=str(e))
+            return
+        status.update(state="ready", finished_at=time.time())
+
+    async def _reload_components(self, components: list, config: SystemConfig, status: dict):
+        async with self._reload_lock:
+            status.update(state="loading", started_at=time.time())
+            try:
+                loaded = await asyncio.to_thread(self._load_components, components, config)
+            except Exception as e:
+                print(f"Model reload failed: {e}")
+                status.update(state="failed", finished_at=time.time(), error=str(e))
+                return
+
+            # Swap everything in one step; requests in flight keep the old objects.
+            for attr, value in loaded.items():
+                setattr(self, attr, value)
+            self.answer_cache.clear()
+            self._loaded_config = config
+            if "embeddings" in components:
+                self.fast_classifier.reset()
+                self._fast_classifier_task = None
+            status.update(state="ready", finished_at=time.time())
+            print(f"Reloaded: {', '.join(components)}")
+
+    def _load_components(self, components: list, config: SystemConfig) -> dict:
+        loaded = {}
+        if "llm" in components:
+            loaded["llm"] = self._build_llm(config)
+        if "embeddings" in components:
+            print(f"Loading Embeddings: {config.embedding_model}")
+            loaded["embeddings"] = self._load_embeddings(config.embedding_model)
+            loaded["vector_store"] = self._build_vector_store(loaded["embeddings"])
+        if "reranker" in components:
+            print(f"Loading Reranker: {config.reranker_model}")
+            loaded["reranker"] = self._load_reranker(config.reranker_model)
+        return loaded
+
+    def _configure_cache(self):
+        self.answer_cache.configure(
+            threshold=self.config.semantic_cache_threshold,
+            ttl_seconds=self.config.semantic_cache_ttl_seconds,
+            max_entries=self.config.semantic_cache_max_entries,
+        )
+        self.fast_classifier.configure(
+            k=self.config.fast_classifier_k,
+            min_confidence=self.config.fast_classifier_confidence,
+            min_examples=self.config.fast_classifier_min_examples,
+        )
+
+    def _setup_models(self):
+        config = self._loaded_config = self.config
+        self.llm = self._build_llm(config)
         
-        print(f"Loading Reranker: {self.config.reranker_model}")
-        try:
-           self.reranker = CrossEncoder(self.config.reranker_model, max_length=512, trust_remote_code=True)
-        except:
-           print("Reranker load failed, fallback to BGE")
-           self.reranker = CrossEncoder("BAAI/bge-reranker-v2-m3")
+        print(f"Loading Embeddings: {config.embedding_model}")
+        self.embeddings = self._load_embeddings(config.embedding_model)
+        
+        print(f"Loading Reranker: {config.reranker_model}")
+        self.reranker = self._load_reranker(config.reranker_model)
+
+    def _load_embeddings(self, model_name: str):
+        if settings.INFERENCE_SIDECAR_SOCKET:
+            from app.services.inference_sidecar import SidecarEmbeddings
+            return SidecarEmbeddings(model_name)
+        from app.services.model_loader import load_embeddings
+        return load_embeddings(model_name)
+
+    def _load_reranker(self, model_name: str):
+        if settings.INFERENCE_SIDECAR_SOCKET:
+            from app.services.inference_sidecar import SidecarReranker
+            return SidecarReranker(model_name)
+        from app.services.model_loader import load_reranker
+        return load_reranker(model_name)
+
+    def _build_llm(self, config: SystemConfig):
+        from langchain_openai import ChatOpenAI
+        from langchain_ollama import ChatOllama
+
+        if config.llm_model.startswith("gpt-5") or config.llm_model.startswith("gpt-4"):
+            return ChatOpenAI(
+                model=config.llm_model, 
+                api_key=settings.OPENAI_API_KEY
+            )
+        return ChatOllama(
+            model=config.llm_model
+        )
 
     def _setup_vector_db(self):
-        self.vector_store = Chroma(
+        self.vector_store = self._build_vector_store(self.embeddings)
+
+    def _build_vector_store(self, embeddings):
+        from langchain_chroma import Chroma
+
+        return Chroma(
             collection_name="helpdesk_rag_qwen",
-            embedding_function=self.embeddings,
+            embedding_function=embeddings,
             persist_directory=settings.CHROMA_PERSIST_DIRECTORY
         )
 
     def _setup_bm25(self):
-        print("Building BM25 Index...")
+        print("Loading BM25 Index...")
+        self.bm25_index = LexicalIndex(settings.BM25_INDEX_DIRECTORY)
+        self._bm25_lock = threading.Lock()
+        self._bm25_checked = time.monotonic()
         try:
-            results = self.vector_store.get()
-            docs = []
-            if results and results["documents"]:
-                for i, content in enumerate(results["documents"]):
-                    if content:
-                        meta = results["metadatas"][i] if results["metadatas"] else {}
-                        docs.append(Document(page_content=content, metadata=meta))
-            
-            if docs:
-                self.bm25_retriever = BM25Retriever.from_documents(docs)
-                self.bm25_retriever.k = 10
-                print(f"BM25 Index built with {len(docs)} documents")
-            else:
-                self.bm25_retriever = None
-                print("BM25 Index empty")
+            if self.bm25_index.open():
+                self._sync_bm25(self.bm25_index.pending())
+        except Exception as e:
+            # Corrupt or truncated snapshot, or a bad journal: rebuild from Chroma below.
+            print(f"BM25 snapshot unreadable, rebuilding: {e}")
+            self.bm25_index.discard()
+        try:
+            if len(self.bm25_index) != self.vector_store._collection.count():
+                self._reconcile_bm25()
+            print(f"BM25 Index loaded with {len(self.bm25_index)} documents")
         except Exception as e:
             print(f"BM25 Init failed: {e}")
-            self.bm25_retriever = None
+
+    def _setup_registry(self):
+        if document_registry.needs_backfill():
+            results = self.vector_store.get(include=["metadatas"])
+            count = document_registry.backfill(results["ids"], results["metadatas"])
+            print(f"Document registry backfilled with {count} documents")
+
+    def _reconcile_bm25(self):
+        chroma_ids = set(self.vector_store.get(include=[])["ids"])
+        index_ids = self.bm25_index.ids()
+        self.bm25_index.remove(list(index_ids - chroma_ids))
+
+        missing = list(chroma_ids - index_ids)
+        for i in range(0, len(missing), 1000):
+            self._sync_bm25(missing[i : i + 1000])
+        self.bm25_index.save(sync=self._sync_bm25)
+
+    def _sync_bm25(self, ids: list):
+        if not ids:
+            return
+        results = self.vector_store.get(ids=ids, include=["documents"])
+        self.bm25_index.add(results["ids"], results["documents"])
+        self.bm25_index.remove(list(set(ids) - set(results["ids"])))
+
+    def _refresh_bm25(self):
+        if time.monotonic() - self._bm25_checked < 2:
+            return
+        self._bm25_checked = time.monotonic()
+        self._sync_bm25(self.bm25_index.pending())
+
+    def _index_chunks(self, ids: list, texts: list = None):
+        with self._bm25_lock:
+            if texts is None:
+                self.bm25_index.remove(ids)
+            else:
+                self.bm25_index.add(ids, texts)
+            self.bm25_index.journal(ids)
+
+            if self.bm25_index.dirty > max(settings.BM25_COMPACT_THRESHOLD, len(self.bm25_index.base) // 10):
+                self.bm25_index.save(sync=self._sync_bm25)
+
+    def _bm25_search(self, query: str, k: int = 10) -> list:
+        with self._bm25_lock:
+            self._refresh_bm25()
+            hits = self.bm25_index.search(query, k=k)
+        return self._get_documents([doc_id for doc_id, _ in hits])
+
+    def _get_documents(self, ids: list) -> list:
+        from langchain_core.documents import Document
+
+        if not ids:
+            return []
+        results = self.vector_store.get(ids=ids, include=["documents", "metadatas"])
+        found = {
+            doc_id: Document(id=doc_id, page_content=content, metadata=meta or {})
+            for doc_id, content, meta in zip(results["ids"], results["documents"], results["metadatas"])
+        }
+        return [found[doc_id] for doc_id in ids if doc_id in found]
+
+    def _setup_batchers(self):
+        self.query_batcher = MicroBatcher(
+            "embed_query", self._embed_queries,
+            max_batch_size=settings.EMBED_BATCH_SIZE, max_wait_ms=settings.EMBED_BATCH_WAIT_MS
+        )
+        self.rerank_batcher = MicroBatcher(
+            "rerank", self._score_pairs,
+            max_batch_size=settings.RERANK_BATCH_SIZE, max_wait_ms=settings.RERANK_BATCH_WAIT_MS
+        )
+
+    def _embed_queries(self, texts: list) -> list:
+        return embed_queries(self.embeddings, texts)
+
+    def _score_pairs(self, pairs: list) -> list:
+        return score_pairs(self.reranker, pairs)
+
+    def batching_stats(self) -> dict:
+        return {
+            "embed_query": self.query_batcher.snapshot(),
+            "ingest_embedding": self.ingest_budget.snapshot(),
+            "rerank": self.rerank_batcher.snapshot(),
+        }
+
+    def _write_chunks(self, ids: list, texts: list, metadatas: list, embeddings: list):
+        self.vector_store._collection.upsert(ids=ids, documents=texts, metadatas=metadatas, embeddings=embeddings)
 
     def _setup_prompts(self):
+        from langchain_core.prompts import ChatPromptTemplate
+
         self.router_prompt = ChatPromptTemplate.from_template(
             """
             You are an AI Support Routing Agent. Classify the following user request.
@@ -132,23 +381,76 @@ class AIEngine:
         )
 
     async def classify_ticket(self, text: str) -> dict:
+        from langchain_core.output_parsers import JsonOutputParser
+
+        await self.ensure_ready()
         chain = self.router_prompt | self.llm | JsonOutputParser()
         try:
             result = await chain.ainvoke({"text": text})
+            result["router"] = "llm"
             return result
         except Exception as e:
             print(f"Classification failed: {e}")
             return {"type": "ticket", "priority": "medium", "category": "general"}
 
-    async def hybrid_search(self, query: str) -> list:
-        vector_docs = await self.vector_store.asimilarity_search(query, k=20)
-        
-        bm25_docs = []
-        if self.bm25_retriever:
-            try:
-                bm25_docs = self.bm25_retriever.invoke(query)
-            except Exception as e:
-                print(f"BM25 search error: {e}")
+    def _load_labeled_feedback(self) -> list:
+        from app.services.ticket_store import ticket_store
+
+        examples = []
+        for d in ticket_store.iter():
+            classification = d.get("result", {}).get("classification")
+            if not classification or classification.get("router") == "knn" or d.get("rating") == "dislike":
+                continue
+            examples.append((d["text"], classification))
+        return examples
+
+    async def _train_fast_classifier(self):
+        try:
+            examples = await blocking_executor.run("feedback_read", self._load_labeled_feedback)
+            examples = [e for e in examples if e[0] not in self.fast_classifier]
+            # Embedded directly in small batches rather than through query_batcher,
+            # so a large history does not queue ahead of live requests.
+            for i in range(0, len(examples), 32):
+                batch = examples[i : i + 32]
+                texts = [text for text, _ in batch]
+                embeddings = await blocking_executor.run("embed_feedback", self._embed_queries, texts)
+                self.fast_classifier.add_examples(texts, embeddings, [label for _, label in batch])
+            print(f"Fast classifier trained on {len(self.fast_classifier)} examples")
+        except Exception as e:
+            print(f"Fast classifier training failed: {e}")
+
+    async def route_ticket(self, text: str, embedding: list = None) -> dict:
+        if not self.config.fast_classifier_enabled:
+            return await self.classify_ticket(text)
+
+        if self._fast_classifier_task is None:
+            self._fast_classifier_task = asyncio.create_task(self._train_fast_classifier())
+        if embedding is None:
+            embedding = await self.query_batcher.submit(text)
+
+        prediction = self.fast_classifier.predict(embedding)
+        if prediction:
+            return prediction
+
+        classification = await self.classify_ticket(text)
+        if classification.get("router") == "llm":
+            self.fast_classifier.add_examples([text], [embedding], [classification])
+        return classification
+
+    async def hybrid_search(self, query: str, embedding: list = None) -> list:
+        await self.ensure_ready()
+        if embedding is None:
+            embedding = await self.query_batcher.submit(query)
+        vector_docs, bm25_docs = await asyncio.gather(
+            blocking_executor.run("vector_search", self.vector_store.similarity_search_by_vector, embedding, k=20),
+            blocking_executor.run("bm25_search", self._bm25_search, query),
+            return_exceptions=True,
+        )
+        if isinstance(vector_docs, Exception):
+            raise vector_docs
+        if isinstance(bm25_docs, Exception):
+            print(f"BM25 search error: {bm25_docs}")
+            bm25_docs = []
         
         seen_ids = set()
         combined_docs = []
@@ -170,15 +472,16 @@ class AIEngine:
 
         passages = [doc.page_content for doc in combined_docs]
         try:
-            ranks = self.reranker.rank(query, passages)
-            sorted_ranks = sorted(ranks, key=lambda x: x['score'], reverse=True)
-            top_indices = [x['corpus_id'] for x in sorted_ranks[:3]]
-            return [passages[i] for i in top_indices]
+            scores = await self.rerank_batcher.submit_many([(query, p) for p in passages])
+            top_indices = sorted(range(len(passages)), key=lambda i: scores[i], reverse=True)[:3]
+            return [combined_docs[i] for i in top_indices]
         except Exception as e:
             print(f"Reranking failed: {e}")
-            return [d.page_content for d in vector_docs[:3]]
+            return vector_docs[:3]
+
+    def _rag_chain(self):
+        from langchain_core.prompts import ChatPromptTemplate
 
-    async def generate_rag_response(self, query: str, context: list) -> str:
         style_instruction = ""
         if self.config.prefer_small_answers:
              style_instruction += " Keep the answer very concise and short."
@@ -198,103 +501,305 @@ class AIEngine:
             "Context:\n{context}\n\n"
             "Question: {question}"
         )
-        chain = prompt | self.llm
-        response = await chain.ainvoke({"context": "\\n\\n".join(context), "question": query})
+        return prompt | self.llm
+
+    async def _critique(self, query: str, answer: str) -> str:
+        from langchain_core.prompts import ChatPromptTemplate
+
+        critic_prompt = ChatPromptTemplate.from_template(
+            """
+            You are a strict editor. Review the following answer.
+            Original Question: {question}
+            Draft Answer: {answer}
+            
+            Critique Criteria:
+            1. Is it concise? (Target: under {max_len} chars)
+            2. Is the tone helpful and professional?
+            
+            If the draft is good, output the draft exactly as is.
+            If it can be improved, output ONLY the improved version.
+            """
+        )
+        critic_chain = critic_prompt | self.llm
+        critic_response = await critic_chain.ainvoke({
+            "question": query, 
+            "answer": answer,
+            "max_len": self.config.max_answer_length or 200
+        })
+        return critic_response.content
+
+    async def generate_rag_response(self, query: str, context: list) -> str:
+        await self.ensure_ready()
+        response = await self._rag_chain().ainvoke({"context": "\\n\\n".join(context), "question": query})
         initial_answer = response.content
 
         if self.config.enable_critic_loop:
-            critic_prompt = ChatPromptTemplate.from_template(
-                """
-                You are a strict editor. Review the following answer.
-                Original Question: {question}
-                Draft Answer: {answer}
-                
-                Critique Criteria:
-                1. Is it concise? (Target: under {max_len} chars)
-                2. Is the tone helpful and professional?
-                
-                If the draft is good, output the draft exactly as is.
-                If it can be improved, output ONLY the improved version.
-                """
-            )
-            critic_chain = critic_prompt | self.llm
-            critic_response = await critic_chain.ainvoke({
-                "question": query, 
-                "answer": initial_answer,
-                "max_len": self.config.max_answer_length or 200
-            })
-            return critic_response.content
+            return await self._critique(query, initial_answer)
             
         return initial_answer
 
-    async def add_documents(self, documents: list):
-        if not documents:
-            return
-        
-        BATCH_SIZE = 50 
-        total_docs = len(documents)
-        
-        for i in range(0, total_docs, BATCH_SIZE):
-            batch = documents[i : i + BATCH_SIZE]
-            await self.vector_store.aadd_documents(batch)
-            
-        self._setup_bm25()
+    async def stream_rag_response(self, query: str, context: list):
+        await self.ensure_ready()
+        async for chunk in self._rag_chain().astream({"context": "\\n\\n".join(context), "question": query}):
+            if chunk.content:
+                yield chunk.content
 
-    async def list_documents(self) -> list:
-        try:
-             results = self.vector_store.get(include=["metadatas"])
-             sources = set()
-             for m in results["metadatas"]:
-                 if m and "source" in m:
-                     sources.add(os.path.basename(m["source"]))
-             return list(sources)
-        except:
-             return []
+    @staticmethod
+    def chunk_id(source: str, content: str) -> str:
+        # Content-addressed, so an unchanged chunk keeps its id (and its
+        # embedding) across re-uploads of the same document.
+        return hashlib.sha256(f"{source}\0{content}".encode("utf-8")).hexdigest()[:32]
+
+    def _chunk_ids(self, documents: list) -> list:
+        return [self.chunk_id(os.path.basename(d.metadata.get("source", "")), d.page_content) for d in documents]
+
+    # The ingest helpers take the pool to run on, so a large upload stays on
+    # the ingestion pipeline's own workers instead of the shared pool.
+
+    async def plan_batches(self, documents: list, executor: BlockingExecutor = blocking_executor) -> list:
+        """Splits `documents` into token-budget batches of (indices, token lengths)."""
+        texts = [d.page_content for d in documents]
+        lengths = await executor.run("tokenize", token_lengths, self.embeddings, texts)
+        return [(batch, [lengths[i] for i in batch]) for batch in self.ingest_budget.batches_for(lengths)]
+
+    async def embed_chunks(self, documents: list, lengths: list = None, executor: BlockingExecutor = blocking_executor) -> list:
+        texts = [d.page_content for d in documents]
+        embeddings = self.embeddings
+        lengths = lengths or await executor.run("tokenize", token_lengths, embeddings, texts)
+        return await executor.run("embed_documents", self.ingest_budget.embed, embeddings, texts, lengths)
+
+    async def write_chunks(self, ids: list, documents: list, embeddings: list, executor: BlockingExecutor = blocking_executor):
+        texts = [d.page_content for d in documents]
+        await executor.run("chroma_write", self._write_chunks, ids, texts, [d.metadata for d in documents], embeddings)
+        await executor.run("bm25_update", self._index_chunks, ids, texts)
+        self.answer_cache.invalidate_chunks(ids)
+
+    async def discard_chunks(self, ids: list, executor: BlockingExecutor = blocking_executor):
+        """Removes chunks written by an ingest that failed before finish_ingest()."""
+        await executor.run("chroma_write", self.vector_store.delete, ids=ids)
+        await executor.run("bm25_update", self._index_chunks, ids)
+        self.answer_cache.invalidate_chunks(ids)
+
+    async def document_unchanged(self, source: str, content_hash: str) -> bool:
+        existing = await blocking_executor.run("registry_read", document_registry.get, source)
+        return bool(existing and content_hash and existing["content_hash"] == content_hash)
+
+    def _record_ingest(self, report: dict) -> dict:
+        report["embeddings_saved"] = report["reused"]
+        report["finished_at"] = time.time()
+        self.embeddings_saved += report["embeddings_saved"]
+        self.ingest_reports.append(report)
+        return report
+
+    async def plan_ingest(self, source: str, documents: list, content_hash: str = None) -> dict:
+        """Diffs `documents` against what is indexed for `source`.
+
+        Only the chunks in `new_ids` need embedding; the plan is completed
+        with finish_ingest() once they have been written.
+        """
+        await self.ensure_ready()
+        plan = {"source": source, "content_hash": content_hash, "unchanged": False, "documents": {},
+                "new_ids": [], "kept_ids": [], "removed_ids": [], "previous": 0}
+        existing = await blocking_executor.run("registry_read", document_registry.get, source)
+        if existing and content_hash and existing["content_hash"] == content_hash:
+            plan.update(unchanged=True, previous=existing["chunk_count"])
+            return plan
+
+        unique = {}
+        for chunk_id, doc in zip(self._chunk_ids(documents), documents):
+            unique.setdefault(chunk_id, doc)
+        previous = set(await blocking_executor.run("registry_read", self._document_chunk_ids, source))
+        plan.update(
+            documents=unique,
+            new_ids=[i for i in unique if i not in previous],
+            kept_ids=[i for i in unique if i in previous],
+            removed_ids=list(previous - set(unique)),
+            previous=len(previous),
+        )
+        return plan
+
+    async def finish_ingest(self, plan: dict, size: int = None) -> dict:
+        source = plan["source"]
+        if plan["unchanged"]:
+            return self._record_ingest({
+                "source": source, "status": "unchanged", "chunks": plan["previous"],
+                "embedded": 0, "reused": plan["previous"], "removed": 0,
+            })
+
+        unique, kept_ids, removed_ids = plan["documents"], plan["kept_ids"], plan["removed_ids"]
+        if kept_ids:
+            # Same text, possibly a different page number or position.
+            await blocking_executor.run(
+                "chroma_write", self.vector_store._collection.update,
+                ids=kept_ids, metadatas=[unique[i].metadata for i in kept_ids]
+            )
+        if removed_ids:
+            await blocking_executor.run("chroma_write", self.vector_store.delete, ids=removed_ids)
+            await blocking_executor.run("bm25_update", self._index_chunks, removed_ids)
+            self.answer_cache.invalidate_chunks(removed_ids)
+        await blocking_executor.run("registry_write", document_registry.replace, source, list(unique), plan["content_hash"], size)
+
+        return self._record_ingest({
+            "source": source, "status": "updated" if plan["previous"] else "added", "chunks": len(unique),
+            "embedded": len(plan["new_ids"]), "reused": len(kept_ids), "removed": len(removed_ids),
+        })
+
+    def ingest_stats(self) -> dict:
+        return {
+            "embeddings_saved": self.embeddings_saved,
+            "embedding_batches": self.ingest_budget.snapshot(),
+            "recent": list(self.ingest_reports)[::-1],
+        }
+
+    async def document_details(self) -> list:
+        await self.ensure_ready()
+        return await blocking_executor.run("registry_read", document_registry.list)
+
+    def _document_chunk_ids(self, source_filename: str) -> list:
+        ids = document_registry.chunk_ids(source_filename)
+        if ids:
+            return ids
+        # Not registered (e.g. written by another tool): ask Chroma by exact source.
+        return self.vector_store.get(where={"source": source_filename}, include=[])["ids"]
 
     async def get_chunks(self, source_filename: str) -> list:
+        await self.ensure_ready()
         try:
-            results = self.vector_store.get(include=["metadatas", "documents"])
-            chunks = []
-            if results and results["ids"]:
-                 for i, meta in enumerate(results["metadatas"]):
-                     if meta and "source" in meta and (source_filename in meta["source"] or meta["source"].endswith(source_filename)):
-                         chunks.append({
-                             "id": results["ids"][i],
-                             "content": results["documents"][i],
-                             "metadata": meta
-                         })
-            return chunks
+            ids = await blocking_executor.run("registry_read", self._document_chunk_ids, source_filename)
+            if not ids:
+                return []
+            results = await blocking_executor.run("chroma_get", self.vector_store.get, ids=ids, include=["metadatas", "documents"])
+            found = {
+                chunk_id: {"id": chunk_id, "content": content, "metadata": meta}
+                for chunk_id, content, meta in zip(results["ids"], results["documents"], results["metadatas"])
+            }
+            return [found[chunk_id] for chunk_id in ids if chunk_id in found]
         except Exception as e:
             print(f"Error fetching chunks: {e}")
             return []
 
     async def update_chunk(self, chunk_id: str, new_content: str):
-        self.vector_store.update_document(chunk_id, Document(page_content=new_content))
+        from langchain_core.documents import Document
+
+        await self.ensure_ready()
+        await blocking_executor.run("chroma_write", self.vector_store.update_document, chunk_id, Document(page_content=new_content))
+        await blocking_executor.run("bm25_update", self._index_chunks, [chunk_id], [new_content])
+        self.answer_cache.invalidate_chunks([chunk_id])
 
     async def delete_document(self, filename: str):
+        await self.ensure_ready()
         try:
-             chunks = await self.get_chunks(filename)
-             ids = [c["id"] for c in chunks]
+             ids = await blocking_executor.run("registry_read", self._document_chunk_ids, filename)
              if ids:
-                 self.vector_store.delete(ids=ids)
-                 self._setup_bm25()
+                 await blocking_executor.run("chroma_write", self.vector_store.delete, ids=ids)
+                 await blocking_executor.run("bm25_update", self._index_chunks, ids)
+                 self.answer_cache.invalidate_chunks(ids)
+             # Last, so a failed delete leaves the chunk ids registered for a retry.
+             await blocking_executor.run("registry_write", document_registry.remove, filename)
         except Exception as e:
             print(f"Delete failed: {e}")
 
+    async def _prepare_request(self, text: str, source: str) -> dict:
+        await self.ensure_ready()
+        state = {
+            "started": time.perf_counter(),
+            "cache_version": self.answer_cache.version,
+            "embedding": None,
+            "cached": None,
+            "classification": None,
+            "docs": [],
+        }
+        if self.config.semantic_cache_enabled or self.config.fast_classifier_enabled:
+            state["embedding"] = await self.query_batcher.submit(text)
+        if self.config.semantic_cache_enabled:
+            state["cached"] = self.answer_cache.lookup(state["embedding"])
+            if state["cached"]:
+                return state
+
+        speculative = None
+        if source in self.config.speculative_retrieval_sources:
+            speculative = SpeculativeTask(self.hybrid_search(text, embedding=state["embedding"]))
+
+        routed_at = time.perf_counter()
+        try:
+            classification = await self.route_ticket(text, state["embedding"])
+        except BaseException:
+            if speculative:
+                self.speculation.discard(speculative)
+            raise
+        decided_after = time.perf_counter() - routed_at
+        state["classification"] = classification
+
+        if classification["type"] == "faq":
+            if speculative:
+                state["docs"] = await self.speculation.use(speculative, decided_after)
+            else:
+                state["docs"] = await self.hybrid_search(text, embedding=state["embedding"])
+        elif speculative:
+            self.speculation.discard(speculative)
+        return state
+
+    def _answer_result(self, state: dict, answer: str) -> dict:
+        classification = state["classification"]
+        if "creating a support ticket" in answer.lower():
+             return {"action": "escalate", "classification": classification, "reason": "RAG miss"}
+        result = {"action": "auto_reply", "response": answer, "sources": [], "classification": classification}
+        if self.config.semantic_cache_enabled and "[ESCALATE]" not in answer:
+            self.answer_cache.store(
+                state["embedding"], result, [d.id for d in state["docs"]],
+                time.perf_counter() - state["started"], state["cache_version"]
+            )
+        return result
+
     async def process_incoming_request(self, text: str, source: str):
-        classification = await self.classify_ticket(text)
-        
+        state = await self._prepare_request(text, source)
+        if state["cached"]:
+            return state["cached"]
+
+        classification = state["classification"]
         if classification["type"] == "spam":
             return {"action": "ignore", "classification": classification}
         
-        if classification["type"] == "faq":
-            docs = await self.hybrid_search(text)
-            if docs:
-                answer = await self.generate_rag_response(text, docs)
-                if "creating a support ticket" in answer.lower():
-                     return {"action": "escalate", "classification": classification, "reason": "RAG miss"}
-                return {"action": "auto_reply", "response": answer, "sources": [], "classification": classification}
+        if classification["type"] == "faq" and state["docs"]:
+            answer = await self.generate_rag_response(text, [d.page_content for d in state["docs"]])
+            return self._answer_result(state, answer)
             
         return {"action": "escalate", "classification": classification}
 
+    async def stream_incoming_request(self, text: str, source: str):
+        """Yields (event, data) pairs: classification, sources, token*, answer?, done."""
+        state = await self._prepare_request(text, source)
+        if state["cached"]:
+            cached = state["cached"]
+            self.time_to_first_token.record(time.perf_counter() - state["started"])
+            yield "classification", cached["classification"]
+            yield "token", cached["response"]
+            yield "done", cached
+            return
+
+        classification = state["classification"]
+        yield "classification", classification
+        if classification["type"] == "spam":
+            yield "done", {"action": "ignore", "classification": classification}
+            return
+
+        if classification["type"] == "faq" and state["docs"]:
+            docs = state["docs"]
+            yield "sources", [{"id": d.id, "content": d.page_content, "metadata": d.metadata} for d in docs]
+
+            answer = ""
+            async for token in self.stream_rag_response(text, [d.page_content for d in docs]):
+                if not answer:
+                    self.time_to_first_token.record(time.perf_counter() - state["started"])
+                answer += token
+                yield "token", token
+
+            if self.config.enable_critic_loop:
+                answer = await self._critique(text, answer)
+                yield "answer", answer
+            yield "done", self._answer_result(state, answer)
+            return
+
+        yield "done", {"action": "escalate", "classification": classification}
+
 ai_engine = AIEngine()
@@ -0,0 +1,164 @@
+import math
+import time
+import sqlite3
+
+# Counters per (granularity, bucket, source, action), plus a log-scale
+# response-time histogram per (granularity, bucket, source). They are
+# updated in the same transaction as the ticket write, so the dashboard
+# only ever reads a bounded number of rollup rows.
+
+BUCKET_SECONDS = {"minute": 60, "hour": 3600, "day": 86400}
+RETENTION_SECONDS = {"minute": 2 * 86400, "hour": 90 * 86400}
+RANGES = {"1h": 3600, "6h": 6 * 3600, "24h": 86400, "7d": 7 * 86400, "30d": 30 * 86400, "90d": 90 * 86400, "all": None}
+ALL = "all"
+
+# Bins grow by 10%, so percentiles are accurate to about 5%.
+LATENCY_BIN_BASE = 1.1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollup_counts (
+    granularity TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    action TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (granularity, bucket, source, action)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_latency (
+    granularity TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    source TEXT NOT NULL,
+    bin INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    PRIMARY KEY (granularity, bucket, source, bin)
+) WITHOUT ROWID;
+"""
+
+
+def latency_bin(ms: float) -> int:
+    return int(math.floor(math.log(max(ms, 1.0), LATENCY_BIN_BASE)))
+
+
+def bin_value(b: int) -> float:
+    return LATENCY_BIN_BASE ** (b + 0.5)
+
+
+def buckets(timestamp: float) -> list:
+    return [(ALL, 0)] + [(g, int(timestamp // size) * size) for g, size in BUCKET_SECONDS.items()]
+
+
+def granularity_for(seconds: float) -> str:
+    if seconds is None:
+        return "day"
+    if seconds <= 6 * 3600:
+        return "minute"
+    if seconds <= 7 * 86400:
+        return "hour"
+    return "day"
+
+
+def record(conn: sqlite3.Connection, entry: dict, sign: int = 1, latency: bool = True):
+    timestamp = entry.get("timestamp") or time.time()
+    source = entry.get("source") or ""
+    action = (entry.get("result") or {}).get("action") or ""
+    latency_ms = entry.get("latency_ms") if latency else None
+    for granularity, bucket in buckets(timestamp):
+        conn.execute(
+            "INSERT INTO rollup_counts (granularity, bucket, source, action, count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (granularity, bucket, source, action) DO UPDATE SET count = count + excluded.count",
+            (granularity, bucket, source, action, sign),
+        )
+        if latency_ms is not None:
+            conn.execute(
+                "INSERT INTO rollup_latency (granularity, bucket, source, bin, count, total_ms) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (granularity, bucket, source, bin) DO UPDATE SET "
+                "count = count + excluded.count, total_ms = total_ms + excluded.total_ms",
+                (granularity, bucket, source, latency_bin(latency_ms), sign, sign * latency_ms),
+            )
+
+
+def prune(conn: sqlite3.Connection, now: float = None):
+    now = now or time.time()
+    for granularity, seconds in RETENTION_SECONDS.items():
+        for table in ("rollup_counts", "rollup_latency"):
+            conn.execute(f"DELETE FROM {table} WHERE granularity = ? AND bucket < ?", (granularity, now - seconds))
+
+
+def clear(conn: sqlite3.Connection):
+    conn.execute("DELETE FROM rollup_counts")
+    conn.execute("DELETE FROM rollup_latency")
+
+
+def percentiles(histogram: list, quantiles=(50, 95, 99)) -> dict:
+    total = sum(count for _, count in histogram)
+    result = {}
+    for q in quantiles:
+        if not total:
+            result[f"p{q}_ms"] = 0.0
+            continue
+        target, seen = q / 100 * total, 0
+        for b, count in histogram:
+            seen += count
+            if seen >= target:
+                result[f"p{q}_ms"] = round(bin_value(b), 1)
+                break
+    return result
+
+
+def summary(conn: sqlite3.Connection, range_key: str = ALL, source: str = None, source_not: str = None, now: float = None) -> dict:
+    if range_key not in RANGES:
+        raise ValueError(f"Unknown range {range_key!r}, expected one of {', '.join(RANGES)}")
+    now = now or time.time()
+    seconds = RANGES[range_key]
+    timeline_granularity = granularity_for(seconds)
+    size = BUCKET_SECONDS[timeline_granularity]
+    since = None if seconds is None else int((now - seconds) // size) * size
+    totals_granularity = ALL if seconds is None else timeline_granularity
+
+    clauses, params = ["granularity = ?"], [totals_granularity]
+    if since is not None:
+        clauses.append("bucket >= ?")
+        params.append(since)
+    if source is not None:
+        clauses.append("source = ?")
+        params.append(source)
+    if source_not is not None:
+        clauses.append("source != ?")
+        params.append(source_not)
+    where = " AND ".join(clauses)
+
+    by_source, by_action, total = {}, {}, 0
+    for src, action, count in conn.execute(f"SELECT source, action, SUM(count) FROM rollup_counts WHERE {where} GROUP BY source, action", params):
+        if not count:
+            continue
+        by_source[src] = by_source.get(src, 0) + count
+        by_action[action] = by_action.get(action, 0) + count
+        total += count
+
+    histogram, latency_count, latency_total = [], 0, 0.0
+    for b, count, total_ms in conn.execute(f"SELECT bin, SUM(count), SUM(total_ms) FROM rollup_latency WHERE {where} GROUP BY bin ORDER BY bin", params):
+        if count:
+            histogram.append((b, count))
+            latency_count += count
+            latency_total += total_ms
+    response_time = {"count": latency_count, "avg_ms": round(latency_total / latency_count, 1) if latency_count else 0.0}
+    response_time.update(percentiles(histogram))
+
+    params[0] = timeline_granularity
+    timeline = [
+        {"bucket": bucket, "count": count}
+        for bucket, count in conn.execute(f"SELECT bucket, SUM(count) FROM rollup_counts WHERE {where} GROUP BY bucket ORDER BY bucket", params)
+        if count
+    ]
+
+    return {
+        "range": range_key,
+        "since": since,
+        "granularity": timeline_granularity,
+        "total": total,
+        "by_source": by_source,
+        "by_action": by_action,
+        "response_time": response_time,
+        "timeline": timeline,
+    }
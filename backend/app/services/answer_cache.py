@@ -0,0 +1,131 @@
+import time
+import copy
+import uuid
+from collections import OrderedDict, defaultdict
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """LRU/TTL cache of auto replies keyed by query embedding.
+
+    A lookup hits when the cosine similarity to a stored query reaches the
+    threshold. Entries remember the chunk ids they were grounded on so they
+    can be dropped when any of those chunks changes.
+    """
+
+    def __init__(self, threshold: float = 0.92, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.by_chunk = defaultdict(set)
+        self._keys = []
+        self._matrix = None
+        self.version = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.saved_seconds = 0.0
+
+    def configure(self, threshold: float, ttl_seconds: float, max_entries: int):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._evict()
+
+    def lookup(self, embedding):
+        started = time.perf_counter()
+        self._expire()
+        if self.entries:
+            if self._matrix is None:
+                self._keys = list(self.entries)
+                self._matrix = np.stack([self.entries[k]["embedding"] for k in self._keys])
+            similarities = self._matrix @ self._normalize(embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.threshold:
+                key = self._keys[best]
+                entry = self.entries[key]
+                self.entries.move_to_end(key)
+                self.hits += 1
+                self.saved_seconds += max(entry["cost"] - (time.perf_counter() - started), 0.0)
+
+                result = copy.deepcopy(entry["result"])
+                result["cached"] = True
+                return result
+
+        self.misses += 1
+        return None
+
+    def store(self, embedding, result: dict, chunk_ids: list, cost_seconds: float, version: int = None):
+        if version is not None and version != self.version:
+            # The index changed while the answer was being generated.
+            return
+        key = str(uuid.uuid4())
+        chunk_ids = [c for c in chunk_ids if c]
+        self.entries[key] = {
+            "embedding": self._normalize(embedding),
+            "result": copy.deepcopy(result),
+            "chunk_ids": chunk_ids,
+            "created": time.monotonic(),
+            "cost": cost_seconds,
+        }
+        for chunk_id in chunk_ids:
+            self.by_chunk[chunk_id].add(key)
+        self._matrix = None
+        self._evict()
+
+    def invalidate_chunks(self, chunk_ids: list):
+        keys = set()
+        for chunk_id in chunk_ids:
+            keys |= self.by_chunk.pop(chunk_id, set())
+        for key in keys:
+            self._drop(key)
+        self.invalidations += len(keys)
+        self.version += 1
+
+    def clear(self):
+        self.version += 1
+        self.entries.clear()
+        self.by_chunk.clear()
+        self._matrix = None
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if not entry:
+            return
+        for chunk_id in entry["chunk_ids"]:
+            keys = self.by_chunk.get(chunk_id)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self.by_chunk[chunk_id]
+        self._matrix = None
+
+    def _expire(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [k for k, e in self.entries.items() if e["created"] < cutoff]
+        for key in expired:
+            self._drop(key)
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self._drop(next(iter(self.entries)))
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidated": self.invalidations,
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+            "avg_latency_saved_ms": round(self.saved_seconds / self.hits * 1000, 1) if self.hits else 0.0,
+        }
@@ -0,0 +1,90 @@
+import asyncio
+from app.services.executor import blocking_executor
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched model calls.
+
+    A batch is flushed once it reaches `max_batch_size` or once its oldest
+    item has waited `max_wait_ms`. While a batch runs, new items queue up
+    and form the next one, so batch size grows with concurrency.
+    """
+
+    def __init__(self, name: str, fn, max_batch_size: int = 32, max_wait_ms: float = 5, max_concurrency: int = 1):
+        self.name = name
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max_concurrency
+        self._queue = None
+        self._workers = []
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    async def submit(self, item):
+        return (await self.submit_many([item]))[0]
+
+    async def submit_many(self, items: list) -> list:
+        if not items:
+            return []
+        self._ensure_workers()
+        loop = asyncio.get_running_loop()
+        futures = []
+        for item in items:
+            future = loop.create_future()
+            self._queue.put_nowait((item, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    def _ensure_workers(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < self.max_concurrency:
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._run(batch)
+
+    async def _run(self, batch: list):
+        batch = [(item, future) for item, future in batch if not future.done()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            results = await blocking_executor.run(self.name, self.fn, [item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def snapshot(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "largest_batch": self.largest_batch,
+            "queued": self._queue.qsize() if self._queue else 0,
+        }
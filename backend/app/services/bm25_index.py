@@ -0,0 +1,382 @@
+import os
+import math
+import json
+import fcntl
+import hashlib
+from collections import Counter, defaultdict
+import numpy as np
+
+
+def default_tokenizer(text: str) -> list:
+    return text.split()
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def bm25_weights(tf, doc_lengths, idf: float, avgdl: float, k1: float, b: float):
+    return idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_lengths / avgdl))
+
+
+class BM25Index:
+    """In-memory BM25 segment keyed by chunk id, updated from add/remove deltas."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, tokenizer=default_tokenizer):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        self.doc_terms = {}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def add(self, ids: list, texts: list):
+        for doc_id, text in zip(ids, texts):
+            if doc_id in self.doc_lengths:
+                self._remove_one(doc_id)
+            if not text:
+                continue
+
+            tokens = self.tokenizer(text)
+            counts = Counter(tokens)
+            for term, tf in counts.items():
+                self.postings[term][doc_id] = tf
+
+            self.doc_lengths[doc_id] = len(tokens)
+            self.doc_terms[doc_id] = tuple(counts)
+            self.total_length += len(tokens)
+
+    def remove(self, ids: list):
+        for doc_id in ids:
+            if doc_id in self.doc_lengths:
+                self._remove_one(doc_id)
+
+    def _remove_one(self, doc_id):
+        for term in self.doc_terms.pop(doc_id):
+            posting = self.postings[term]
+            posting.pop(doc_id, None)
+            if not posting:
+                del self.postings[term]
+
+        self.total_length -= self.doc_lengths.pop(doc_id)
+
+    def df(self, term: str) -> int:
+        return len(self.postings.get(term, ()))
+
+    def accumulate(self, term: str, idf: float, avgdl: float, scores: dict):
+        for doc_id, tf in self.postings.get(term, {}).items():
+            scores[doc_id] += bm25_weights(tf, self.doc_lengths[doc_id], idf, avgdl, self.k1, self.b)
+
+    def search(self, query: str, k: int = 10) -> list:
+        if not self.doc_lengths:
+            return []
+
+        n = len(self.doc_lengths)
+        avgdl = self.total_length / n or 1.0
+        scores = defaultdict(float)
+        for term in self.tokenizer(query):
+            df = self.df(term)
+            if df:
+                self.accumulate(term, math.log(1 + (n - df + 0.5) / (df + 0.5)), avgdl, scores)
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+
+class BM25Snapshot:
+    """Immutable CSR term/posting matrix, memory-mapped from disk.
+
+    Rows are sorted 64-bit term hashes and columns are documents sorted by
+    chunk id, so term and id lookups are binary searches over the mapped
+    arrays and nothing is materialised per document at load time.
+    """
+
+    ARRAYS = ("term_hashes", "indptr", "postings", "tfs", "doc_lengths", "ids")
+
+    def __init__(self, term_hashes, indptr, postings, tfs, doc_lengths, ids):
+        self.term_hashes = term_hashes
+        self.indptr = indptr
+        self.postings = postings
+        self.tfs = tfs
+        self.doc_lengths = doc_lengths
+        self.ids = ids
+        self.total_length = int(doc_lengths.sum()) if len(doc_lengths) else 0
+
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.zeros(0, dtype=np.uint64), np.zeros(1, dtype=np.int64),
+            np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32),
+            np.zeros(0, dtype=np.int32), np.zeros(0, dtype="S1"),
+        )
+
+    @classmethod
+    def load(cls, path: str):
+        arrays = []
+        for name in cls.ARRAYS:
+            file_path = os.path.join(path, f"{name}.npy")
+            try:
+                arrays.append(np.load(file_path, mmap_mode="r"))
+            except ValueError:
+                # Zero-length arrays cannot be mapped.
+                arrays.append(np.load(file_path))
+        return cls(*arrays)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for name in self.ARRAYS:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def locate(self, ids: list) -> np.ndarray:
+        if not len(self.ids) or not ids:
+            return np.zeros(0, dtype=np.int64)
+        keys = np.array([i.encode("utf-8") for i in ids])
+        pos = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        return pos[self.ids[pos] == keys]
+
+    def row(self, term: str):
+        if not len(self.term_hashes):
+            return 0, 0
+        h = np.uint64(term_hash(term))
+        pos = int(np.searchsorted(self.term_hashes, h))
+        if pos < len(self.term_hashes) and self.term_hashes[pos] == h:
+            return int(self.indptr[pos]), int(self.indptr[pos + 1])
+        return 0, 0
+
+    @classmethod
+    def merge(cls, base, deleted: np.ndarray, delta: BM25Index):
+        keep = ~deleted
+        base_ids = np.asarray(base.ids)[keep]
+        delta_ids = list(delta.doc_lengths)
+        if delta_ids:
+            all_ids = np.concatenate([base_ids, np.array([i.encode("utf-8") for i in delta_ids])])
+        else:
+            all_ids = base_ids
+        order = np.argsort(all_ids, kind="stable")
+        new_pos = np.empty(len(all_ids), dtype=np.int32)
+        new_pos[order] = np.arange(len(all_ids), dtype=np.int32)
+
+        base_new = np.full(len(base), -1, dtype=np.int32)
+        base_new[keep] = new_pos[:len(base_ids)]
+        base_terms = np.repeat(np.asarray(base.term_hashes), np.diff(np.asarray(base.indptr)))
+        base_docs = base_new[np.asarray(base.postings)]
+        live = base_docs >= 0
+
+        delta_terms, delta_docs, delta_tfs = [], [], []
+        delta_pos = dict(zip(delta_ids, new_pos[len(base_ids):].tolist()))
+        for term, posting in delta.postings.items():
+            h = term_hash(term)
+            for doc_id, tf in posting.items():
+                delta_terms.append(h)
+                delta_docs.append(delta_pos[doc_id])
+                delta_tfs.append(tf)
+
+        terms = np.concatenate([base_terms[live], np.array(delta_terms, dtype=np.uint64)])
+        docs = np.concatenate([base_docs[live], np.array(delta_docs, dtype=np.int32)])
+        tfs = np.concatenate([np.asarray(base.tfs)[live], np.array(delta_tfs, dtype=np.float32)])
+
+        nnz_order = np.lexsort((docs, terms))
+        terms, docs, tfs = terms[nnz_order], docs[nnz_order], tfs[nnz_order]
+        term_hashes, counts = np.unique(terms, return_counts=True)
+        indptr = np.zeros(len(term_hashes) + 1, dtype=np.int64)
+        np.cumsum(counts, out=indptr[1:])
+
+        doc_lengths = np.concatenate([
+            np.asarray(base.doc_lengths)[keep],
+            np.array([delta.doc_lengths[i] for i in delta_ids], dtype=np.int32),
+        ])[order]
+
+        return cls(term_hashes, indptr, docs, tfs, doc_lengths, all_ids[order])
+
+
+class LexicalIndex:
+    """BM25 over a shared on-disk snapshot plus a private in-memory delta.
+
+    Every worker maps the same snapshot generation read-only. Changes go to
+    the delta segment and to a per-generation journal of touched chunk ids
+    that other workers replay; `save` folds everything into a new
+    generation. As in Lucene, deleted snapshot documents keep counting
+    towards document frequencies until the next compaction.
+    """
+
+    def __init__(self, directory: str, k1: float = 1.5, b: float = 0.75):
+        self.directory = directory
+        self.k1 = k1
+        self.b = b
+        os.makedirs(directory, exist_ok=True)
+        self._reset(BM25Snapshot.empty(), None)
+
+    def _reset(self, base: BM25Snapshot, generation):
+        self.base = base
+        self.generation = generation
+        self.deleted = np.zeros(len(base), dtype=bool)
+        self.delta = BM25Index(self.k1, self.b)
+        self.journal_offset = 0
+
+    def __len__(self):
+        return len(self.base) - int(self.deleted.sum()) + len(self.delta)
+
+    @property
+    def dirty(self) -> int:
+        return int(self.deleted.sum()) + len(self.delta)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _read_current(self):
+        try:
+            with open(self._path("CURRENT"), "r", encoding="utf-8") as f:
+                return json.load(f)["generation"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def open(self) -> bool:
+        generation = self._read_current()
+        if generation is None:
+            return False
+        self._reset(BM25Snapshot.load(self._path(f"gen-{generation}")), generation)
+        return True
+
+    def discard(self):
+        """Drops an unreadable snapshot and its journal; the next save() publishes a fresh generation."""
+        with open(self._path("LOCK"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            generation = self._read_current()
+            try:
+                os.remove(self._path("CURRENT"))
+            except OSError:
+                pass
+            self._cleanup(generation)
+            self._cleanup(None)
+            self._reset(BM25Snapshot.empty(), None)
+
+    def ids(self) -> set:
+        live = np.asarray(self.base.ids)[~self.deleted]
+        return {i.decode("utf-8") for i in live.tolist()} | set(self.delta.doc_lengths)
+
+    def add(self, ids: list, texts: list):
+        self.deleted[self.base.locate(ids)] = True
+        self.delta.add(ids, texts)
+
+    def remove(self, ids: list):
+        self.deleted[self.base.locate(ids)] = True
+        self.delta.remove(ids)
+
+    def journal(self, ids: list):
+        if not ids:
+            return
+        with open(self._path("LOCK"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            generation = self._read_current()
+            journal_path = self._path(f"journal-{generation or 0}.log")
+            caught_up = generation == self.generation and self._size(journal_path) == self.journal_offset
+            with open(journal_path, "a", encoding="utf-8") as f:
+                f.write("".join(f"{i}\n" for i in ids))
+            if caught_up:
+                self.journal_offset = self._size(journal_path)
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def pending(self) -> list:
+        """Chunk ids journaled by other workers since this one last looked.
+
+        Switches to a newer snapshot generation first if one was published;
+        it already contains everything journaled before it.
+        """
+        generation = self._read_current()
+        if generation != self.generation:
+            self.open()
+        try:
+            with open(self._path(f"journal-{self.generation or 0}.log"), "r", encoding="utf-8") as f:
+                f.seek(self.journal_offset)
+                lines = f.read().splitlines()
+                self.journal_offset = f.tell()
+        except OSError:
+            return []
+        return list(dict.fromkeys(line for line in lines if line))
+
+    def save(self, sync=None):
+        """Compact the snapshot and delta into a new published generation.
+
+        `sync` receives ids journaled by other workers and runs under the
+        lock, so their changes are folded in before the journal rotates.
+        """
+        with open(self._path("LOCK"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            ids = self.pending()
+            if ids and sync:
+                sync(ids)
+
+            merged = BM25Snapshot.merge(self.base, self.deleted, self.delta)
+            generation = (self.generation or 0) + 1
+            merged.save(self._path(f"gen-{generation}"))
+
+            tmp_path = self._path("CURRENT.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"generation": generation, "documents": len(merged)}, f)
+            os.replace(tmp_path, self._path("CURRENT"))
+
+            previous = self.generation
+            self._reset(BM25Snapshot.load(self._path(f"gen-{generation}")), generation)
+            self._cleanup(previous)
+
+    def _cleanup(self, generation):
+        # Workers still mapping the old files keep them alive until they reopen.
+        paths = [self._path(f"journal-{generation or 0}.log")]
+        if generation is not None:
+            old = self._path(f"gen-{generation}")
+            paths += [os.path.join(old, f"{name}.npy") for name in BM25Snapshot.ARRAYS]
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if generation is not None:
+            try:
+                os.rmdir(self._path(f"gen-{generation}"))
+            except OSError:
+                pass
+
+    def search(self, query: str, k: int = 10) -> list:
+        n = len(self.base) + len(self.delta)
+        if not n:
+            return []
+        avgdl = (self.base.total_length + self.delta.total_length) / n or 1.0
+
+        base_scores = np.zeros(len(self.base), dtype=np.float32)
+        delta_scores = defaultdict(float)
+        for term in self.delta.tokenizer(query):
+            start, end = self.base.row(term)
+            df = (end - start) + self.delta.df(term)
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            if end > start:
+                docs = self.base.postings[start:end]
+                base_scores[docs] += bm25_weights(
+                    self.base.tfs[start:end], self.base.doc_lengths[docs], idf, avgdl, self.k1, self.b
+                )
+            self.delta.accumulate(term, idf, avgdl, delta_scores)
+
+        base_scores[self.deleted] = 0
+        hits = np.flatnonzero(base_scores)
+        if len(hits) > k:
+            hits = hits[np.argpartition(-base_scores[hits], k)[:k]]
+
+        results = [(self.base.ids[i].decode("utf-8"), float(base_scores[i])) for i in hits]
+        results.extend(delta_scores.items())
+        return sorted(results, key=lambda x: x[1], reverse=True)[:k]
@@ -0,0 +1,98 @@
+import time
+import asyncio
+from collections import deque
+from app.services.metrics import LatencyTracker
+
+OVERFLOW_POLICIES = ("merge", "drop")
+
+
+class ChatDispatcher:
+    """Runs `handler(chat_id, item)` concurrently across chats but strictly
+    in order within a chat.
+
+    At most `max_concurrency` handlers run at once. Each chat holds at most
+    `max_backlog` items that are not being handled yet; a burst beyond that
+    is either folded into the newest waiting item with `merge(old, new)` or
+    dropped.
+    """
+
+    def __init__(self, handler, max_concurrency: int = 8, max_backlog: int = 3, overflow: str = "merge", merge=None):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}, expected one of {', '.join(OVERFLOW_POLICIES)}")
+        self.handler = handler
+        self.max_backlog = max(max_backlog, 1)
+        self.overflow = overflow if merge is not None else "drop"
+        self.merge = merge
+        self._semaphore = asyncio.Semaphore(max(max_concurrency, 1))
+        self.max_concurrency = max(max_concurrency, 1)
+        self._backlogs = {}
+        self._workers = {}
+        self.active = 0
+        self.handled = 0
+        self.failed = 0
+        self.dropped = 0
+        self.merged = 0
+        self.wait = LatencyTracker()
+        self.latency = LatencyTracker()
+
+    def submit(self, chat_id, item) -> bool:
+        """Queues `item` for its chat without waiting; returns False if it was dropped."""
+        backlog = self._backlogs.setdefault(chat_id, deque())
+        if len(backlog) >= self.max_backlog:
+            if self.overflow == "drop":
+                self.dropped += 1
+                return False
+            received_at, pending = backlog[-1]
+            backlog[-1] = (received_at, self.merge(pending, item))
+            self.merged += 1
+        else:
+            backlog.append((time.perf_counter(), item))
+
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return True
+
+    async def _drain(self, chat_id):
+        backlog = self._backlogs[chat_id]
+        try:
+            while backlog:
+                async with self._semaphore:
+                    received_at, item = backlog.popleft()
+                    self.wait.record(time.perf_counter() - received_at)
+                    self.active += 1
+                    try:
+                        await self.handler(chat_id, item)
+                        self.handled += 1
+                    except Exception as e:
+                        self.failed += 1
+                        print(f"Chat dispatcher: handler failed for {chat_id}: {e}")
+                    finally:
+                        self.active -= 1
+                        self.latency.record(time.perf_counter() - received_at)
+        finally:
+            if not backlog:
+                self._backlogs.pop(chat_id, None)
+                self._workers.pop(chat_id, None)
+
+    async def close(self):
+        workers = list(self._workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self._backlogs.clear()
+        self._workers.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "chats": len(self._workers),
+            "queued": sum(len(b) for b in self._backlogs.values()),
+            "handled": self.handled,
+            "failed": self.failed,
+            "merged": self.merged,
+            "dropped": self.dropped,
+            "queue_wait": self.wait.snapshot(),
+            "reply_latency": self.latency.snapshot(),
+        }
@@ -0,0 +1,138 @@
+import os
+import time
+import sqlite3
+import threading
+from contextlib import contextmanager
+from app.core.config import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    source TEXT PRIMARY KEY,
+    content_hash TEXT,
+    size INTEGER,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS document_chunks (
+    chunk_id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS document_chunks_source ON document_chunks (source, position);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+BACKFILL_KEY = "backfilled_from_chroma"
+
+
+class DocumentRegistry:
+    """Maps each ingested source file to its chunk ids in the vector store,
+    with the file's content hash, size and ingest time."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @contextmanager
+    def _write(self):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def needs_backfill(self) -> bool:
+        with self._lock:
+            return self._connect().execute("SELECT 1 FROM meta WHERE key = ?", (BACKFILL_KEY,)).fetchone() is None
+
+    def backfill(self, ids: list, metadatas: list):
+        """One-time import of chunks that were indexed before the registry existed."""
+        by_source = {}
+        for chunk_id, meta in zip(ids, metadatas):
+            if meta and meta.get("source"):
+                by_source.setdefault(os.path.basename(meta["source"]), []).append(chunk_id)
+        with self._write() as conn:
+            for source, chunk_ids in by_source.items():
+                self._add_chunks(conn, source, chunk_ids, time.time())
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (BACKFILL_KEY, str(len(ids))))
+        return len(by_source)
+
+    def _add_chunks(self, conn: sqlite3.Connection, source: str, chunk_ids: list, ingested_at: float,
+                    content_hash: str = None, size: int = None):
+        conn.execute(
+            "INSERT INTO documents (source, content_hash, size, chunk_count, ingested_at) VALUES (?, ?, ?, 0, ?) "
+            "ON CONFLICT (source) DO UPDATE SET ingested_at = excluded.ingested_at, "
+            "content_hash = COALESCE(excluded.content_hash, content_hash), size = COALESCE(excluded.size, size)",
+            (source, content_hash, size, ingested_at),
+        )
+        start = conn.execute("SELECT COALESCE(MAX(position) + 1, 0) FROM document_chunks WHERE source = ?", (source,)).fetchone()[0]
+        conn.executemany(
+            "INSERT OR REPLACE INTO document_chunks (chunk_id, source, position) VALUES (?, ?, ?)",
+            [(chunk_id, source, start + i) for i, chunk_id in enumerate(chunk_ids)],
+        )
+        self._recount(conn, source)
+
+    def _recount(self, conn: sqlite3.Connection, source: str):
+        conn.execute(
+            "UPDATE documents SET chunk_count = (SELECT COUNT(*) FROM document_chunks WHERE source = ?) WHERE source = ?",
+            (source, source),
+        )
+
+    def replace(self, source: str, chunk_ids: list, content_hash: str = None, size: int = None):
+        with self._write() as conn:
+            conn.execute("DELETE FROM document_chunks WHERE source = ?", (source,))
+            conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+            self._add_chunks(conn, source, chunk_ids, time.time(), content_hash, size)
+
+    def get(self, source: str) -> dict:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT source, content_hash, size, chunk_count, ingested_at FROM documents WHERE source = ?", (source,)
+            ).fetchone()
+        return self._document(row) if row else None
+
+    def list(self) -> list:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT source, content_hash, size, chunk_count, ingested_at FROM documents ORDER BY source"
+            ).fetchall()
+        return [self._document(row) for row in rows]
+
+    @staticmethod
+    def _document(row: tuple) -> dict:
+        return dict(zip(("source", "content_hash", "size", "chunk_count", "ingested_at"), row))
+
+    def chunk_ids(self, source: str) -> list:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT chunk_id FROM document_chunks WHERE source = ? ORDER BY position", (source,)
+            ).fetchall()
+        return [chunk_id for (chunk_id,) in rows]
+
+    def remove(self, source: str) -> list:
+        """Forgets the document and returns the chunk ids it owned."""
+        with self._write() as conn:
+            ids = [r[0] for r in conn.execute("SELECT chunk_id FROM document_chunks WHERE source = ?", (source,))]
+            conn.execute("DELETE FROM document_chunks WHERE source = ?", (source,))
+            conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+        return ids
+
+
+document_registry = DocumentRegistry(settings.DOCUMENT_REGISTRY_PATH)
@@ -1,118 +1,304 @@
+import re
+import ssl
 import asyncio
-import imaplib
+import random
 import smtplib
 import email
 from email.mime.text import MIMEText
+import aioimaplib
 from app.services.ai_engine import ai_engine
+from app.services.executor import blocking_executor
+from app.services.ticket_store import ticket_store
+from app.services.translation import translation_service
 import time
 
+# IDLE is re-issued well inside the 29 minutes servers allow, which also
+# notices a half-open connection within this interval.
+IDLE_SECONDS = 5 * 60
+# Servers without IDLE are polled over the same connection instead.
+POLL_SECONDS = 30
+MAX_BACKOFF_SECONDS = 300
+# A connection that stayed up this long resets the reconnect backoff.
+HEALTHY_SECONDS = 60
+UID_RE = re.compile(rb"\(.*\bUID (\d+)")
+
 class EmailBotService:
+    """Keeps one IMAP connection open and waits for new mail with IDLE.
+
+    The highest handled UID is checkpointed per mailbox in the ticket store
+    together with the folder's UIDVALIDITY, so after a restart only mail
+    that arrived since is handled, and none of it is skipped. The checkpoint
+    moves past a message only once it has been answered; a failure ends the
+    session and the message is retried after reconnecting.
+    """
+
     def __init__(self):
         self.is_running = False
+        self.connected = False
+        self.mode = None
+        self._session = None
+        self.reconnects = 0
+        self.processed = 0
+        self.unparsed = 0
+        self.last_error = None
+
+    @staticmethod
+    def _configured() -> bool:
+        config = ai_engine.config
+        return bool(config.gmail_enabled and config.gmail_email and config.gmail_password)
 
     async def start_loop(self):
         print("Email Service: Background loop init...")
+        self.is_running = True
+        backoff = 1
         while True:
-            try:
-                if ai_engine.config.gmail_enabled and ai_engine.config.gmail_email and ai_engine.config.gmail_password:
-                     await self.check_emails()
+            if not self._configured():
+                backoff = 1
+                await asyncio.sleep(10)
+                continue
+
+            started = time.monotonic()
+            self._session = asyncio.create_task(self._listen())
+            await asyncio.wait({self._session})
+            if self._session.cancelled():
+                # restart(): reconnect right away with the new settings.
+                continue
+
+            error = self._session.exception()
+            self.last_error = str(error) if error else None
+            print(f"Email Service Error: {error}")
+            if time.monotonic() - started > HEALTHY_SECONDS:
+                backoff = 1
+            self.reconnects += 1
+            await asyncio.sleep(backoff + random.uniform(0, backoff / 2))
+            backoff = min(backoff * 2, MAX_BACKOFF_SECONDS)
+
+    def restart(self):
+        if self._session and not self._session.done():
+            self._session.cancel()
+
+    def _client(self, lost: asyncio.Future):
+        config = ai_engine.config
+        context = ssl.create_default_context() if config.gmail_imap_ssl else None
+
+        def connection_lost(error):
+            if not lost.done():
+                lost.set_result(error)
+
+        return aioimaplib.IMAP4(
+            host=config.gmail_imap_host, port=config.gmail_imap_port, timeout=30,
+            conn_lost_cb=connection_lost, ssl_context=context,
+        )
+
+    @staticmethod
+    async def _until_lost(awaitable, lost: asyncio.Future):
+        """Awaits `awaitable` unless the connection drops first."""
+        task = asyncio.ensure_future(awaitable)
+        await asyncio.wait({task, lost}, return_when=asyncio.FIRST_COMPLETED)
+        if not task.done():
+            task.cancel()
+            raise ConnectionError(f"IMAP connection lost: {lost.result()}")
+        return task.result()
+
+    async def _listen(self):
+        config = ai_engine.config
+        account = config.gmail_email
+        lost = asyncio.get_running_loop().create_future()
+        client = self._client(lost)
+        try:
+            await client.wait_hello_from_server()
+            response = await client.login(account, config.gmail_password)
+            if response.result != "OK":
+                raise ConnectionError(f"IMAP login failed: {response.lines}")
+            response = await client.select("INBOX")
+            if response.result != "OK":
+                raise ConnectionError(f"IMAP select failed: {response.lines}")
+            select_lines = response.lines
+
+            self.connected = True
+            self.mode = "idle" if client.has_capability("IDLE") else "poll"
+            print(f"Email Service: Connected to {config.gmail_imap_host}, waiting for mail ({self.mode})")
+            while True:
+                await self._fetch_new(client, account, select_lines)
+                if self.mode == "idle":
+                    idle = await client.idle_start(timeout=IDLE_SECONDS)
+                    await self._until_lost(client.wait_server_push(), lost)
+                    client.idle_done()
+                    await asyncio.wait_for(idle, 30)
                 else:
+                    await self._until_lost(asyncio.sleep(POLL_SECONDS), lost)
+        finally:
+            self.connected = False
+            if not lost.done():
+                try:
+                    await asyncio.wait_for(client.logout(), 5)
+                except Exception:
                     pass
-            except Exception as e:
-                print(f"Email Service Error: {e}")
-            
-            await asyncio.sleep(60)
 
-    async def check_emails(self):
+    @staticmethod
+    def _status_code(lines: list, name: bytes):
+        pattern = re.compile(rb"\[" + name + rb" (\d+)\]")
+        for line in lines:
+            match = pattern.search(bytes(line))
+            if match:
+                return int(match.group(1))
+        return None
+
+    @staticmethod
+    def _checkpoint_key(account: str) -> str:
+        return f"imap_checkpoint:{account}:INBOX"
+
+    async def _search(self, client, criteria: str) -> list:
+        response = await client.uid_search(criteria, charset=None)
+        if response.result != "OK":
+            raise ConnectionError(f"IMAP search failed: {response.lines}")
+        return sorted(int(u) for u in bytes(response.lines[0]).split() if u.isdigit())
+
+    async def _uids_from(self, client, first_uid: int) -> list:
+        # UID FETCH n:* is understood by every server, unlike SEARCH UID.
+        # "n:*" always matches the newest message, even when its UID is below n.
+        response = await client.uid("fetch", f"{first_uid}:*", "(UID)")
+        if response.result != "OK":
+            raise ConnectionError(f"IMAP fetch failed: {response.lines}")
+        uids = (UID_RE.search(bytes(line)) for line in response.lines)
+        return sorted({int(m.group(1)) for m in uids if m and int(m.group(1)) >= first_uid})
+
+    async def _store_flag(self, client, uid: int, flag: str):
+        response = await client.uid("store", str(uid), "+FLAGS", f"({flag})")
+        if response.result != "OK":
+            raise ConnectionError(f"IMAP store failed: {response.lines}")
+
+    async def _handle_uid(self, client, uid: int):
+        # BODY.PEEK leaves the message unread until it has been answered.
+        response = await client.uid("fetch", str(uid), "(BODY.PEEK[])")
+        raw = next((line for line in response.lines if isinstance(line, bytearray)), None)
+        if response.result != "OK" or raw is None:
+            raise ConnectionError(f"IMAP fetch of UID {uid} failed: {response.lines}")
         try:
-            mail = imaplib.IMAP4_SSL("imap.gmail.com")
-            mail.login(ai_engine.config.gmail_email, ai_engine.config.gmail_password)
-            mail.select("inbox")
-
-            status, messages = mail.search(None, '(UNSEEN)')
-            if status != "OK":
-                return
-
-            msg_ids = messages[0].split()
-            for msg_id in msg_ids:
-                status, msg_data = mail.fetch(msg_id, "(RFC822)")
-                for response_part in msg_data:
-                    if isinstance(response_part, tuple):
-                        msg = email.message_from_bytes(response_part[1])
-                        subject = email.header.decode_header(msg["Subject"])[0][0]
-                        if isinstance(subject, bytes):
-                            subject = subject.decode()
-                        
-                        sender = msg.get("From")
-                        
-                        body = ""
-                        if msg.is_multipart():
-                            for part in msg.walk():
-                                if part.get_content_type() == "text/plain":
-                                    body = part.get_payload(decode=True).decode()
-                                    break
-                        else:
-                            body = msg.get_payload(decode=True).decode()
-
-                        print(f"Email received from {sender}: {subject}")
-                        
-                        full_text = f"Subject: {subject}\n\n{body}"
-                        
-                        result = await ai_engine.process_incoming_request(full_text, "email")
-                        action = result.get("action")
-                        response_text = result.get("response", "")
-                        
-                        if action == "escalate" or "[ESCALATE]" in response_text:
-                             from deep_translator import GoogleTranslator
-                             text_content = full_text[:500]
-                             try:
-                                 tr_en = GoogleTranslator(source='auto', target='en').translate(text_content)
-                                 tr_ru = GoogleTranslator(source='auto', target='ru').translate(text_content)
-                                 tr_kk = GoogleTranslator(source='auto', target='kk').translate(text_content)
-                             except:
-                                 tr_en, tr_ru, tr_kk = text_content, text_content, text_content
-
-                             from app.api.endpoints.ingest import LogEntry, ingest_log
-                             await ingest_log(LogEntry(
-                                 text=f"Subject: {subject}",
-                                 source="email",
-                                 status="pending",
-                                 contact_info={"email": sender},
-                                 translations={"en": tr_en, "ru": tr_ru, "kk": tr_kk},
-                                 result={"action": "escalate", "response": "Ticket created"}
-                             ))
-                             self.send_reply(sender, subject, "Your request has been forwarded to a specialist.")
-                             
-                        elif action == "auto_reply":
-                            from app.api.endpoints.ingest import LogEntry, ingest_log
-                            await ingest_log(LogEntry(
-                                 text=f"Subject: {subject}",
-                                 source="email",
-                                 result={"action": "auto_reply", "response": response_text}
-                            ))
-
-                            self.send_reply(sender, subject, response_text)
-
-                        elif action == "ignore":
-                            print(f"Email: Ignored spam from {sender}")
-            
-            mail.close()
-            mail.logout()
+            sender, subject, body = self.parse_email(bytes(raw))
         except Exception as e:
-            print(f"IMAP Error: {e}")
+            # Retrying cannot help; leave it unread and flagged for a person.
+            self.unparsed += 1
+            print(f"Email Service: could not parse UID {uid}, flagged for review: {e}")
+            await self._store_flag(client, uid, "\\Flagged")
+            return
+        await self.handle_email(sender, subject, body)
+        await self._store_flag(client, uid, "\\Seen")
+
+    async def _save_checkpoint(self, key: str, uidvalidity: int, uid: int, unseen: list = ()):
+        checkpoint = {"uidvalidity": uidvalidity, "uid": uid, "unseen": list(unseen)}
+        await blocking_executor.run("ticket_store", ticket_store.set_meta, key, checkpoint)
+
+    async def _fetch_new(self, client, account: str, select_lines: list):
+        uidvalidity = self._status_code(select_lines, b"UIDVALIDITY")
+        key = self._checkpoint_key(account)
+        checkpoint = await blocking_executor.run("ticket_store", ticket_store.get_meta, key)
+
+        if not checkpoint or checkpoint["uidvalidity"] != uidvalidity:
+            # First start, or the folder was recreated and old UIDs mean nothing:
+            # answer what is unread up to the end of the mailbox. The unread
+            # UIDs are checkpointed first and removed one by one as they are
+            # answered, so an interrupted pass resumes where it stopped.
+            if checkpoint:
+                print(f"Email Service: UIDVALIDITY changed for {account}, falling back to unseen mail")
+            uidnext = self._status_code(select_lines, b"UIDNEXT")
+            unseen = await self._search(client, "UNSEEN")
+            last_uid = uidnext - 1 if uidnext else max(await self._uids_from(client, 1) or [0])
+            checkpoint = {"uidvalidity": uidvalidity, "uid": max([last_uid] + unseen), "unseen": unseen}
+            await self._save_checkpoint(key, uidvalidity, checkpoint["uid"], unseen)
+
+        unseen = list(checkpoint.get("unseen", []))
+        while unseen:
+            await self._handle_uid(client, unseen[0])
+            unseen.pop(0)
+            await self._save_checkpoint(key, uidvalidity, checkpoint["uid"], unseen)
+
+        for uid in await self._uids_from(client, checkpoint["uid"] + 1):
+            await self._handle_uid(client, uid)
+            await self._save_checkpoint(key, uidvalidity, uid)
+
+    @staticmethod
+    def parse_email(raw: bytes) -> tuple:
+        msg = email.message_from_bytes(raw)
+        subject = email.header.decode_header(msg["Subject"] or "")[0][0]
+        if isinstance(subject, bytes):
+            subject = subject.decode()
+
+        sender = msg.get("From")
+
+        body = ""
+        if msg.is_multipart():
+            for part in msg.walk():
+                if part.get_content_type() == "text/plain":
+                    body = part.get_payload(decode=True).decode()
+                    break
+        else:
+            body = msg.get_payload(decode=True).decode()
+        return sender, subject, body
+
+    async def handle_email(self, sender: str, subject: str, body: str):
+        """Answers one message; errors propagate so the caller keeps it for a retry."""
+        print(f"Email received from {sender}: {subject}")
+
+        full_text = f"Subject: {subject}\n\n{body}"
+
+        started = time.perf_counter()
+        result = await ai_engine.process_incoming_request(full_text, "email")
+        latency_ms = (time.perf_counter() - started) * 1000
+        action = result.get("action")
+        response_text = result.get("response", "")
+
+        if action == "escalate" or "[ESCALATE]" in response_text:
+             from app.api.endpoints.ingest import LogEntry, ingest_log
+             entry = LogEntry(
+                 text=f"Subject: {subject}",
+                 source="email",
+                 status="pending",
+                 contact_info={"email": sender},
+                 result={"action": "escalate", "response": "Ticket created"},
+                 latency_ms=latency_ms
+             )
+             await ingest_log(entry)
+             await self.reply(sender, subject, "Your request has been forwarded to a specialist.")
+             translation_service.translate_ticket(entry.id, full_text[:500])
+
+        elif action == "auto_reply":
+            from app.api.endpoints.ingest import LogEntry, ingest_log
+            await ingest_log(LogEntry(
+                 text=f"Subject: {subject}",
+                 source="email",
+                 result={"action": "auto_reply", "response": response_text},
+                 latency_ms=latency_ms
+            ))
+
+            await self.reply(sender, subject, response_text)
+
+        elif action == "ignore":
+            print(f"Email: Ignored spam from {sender}")
+        self.processed += 1
+
+    async def reply(self, to_email, subject, body):
+        await blocking_executor.run("smtp", self.send_reply, to_email, subject, body)
 
     def send_reply(self, to_email, subject, body):
-        try:
-            msg = MIMEText(body)
-            msg['Subject'] = f"Re: {subject}"
-            msg['From'] = ai_engine.config.gmail_email
-            msg['To'] = to_email
-
-            with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
-                server.login(ai_engine.config.gmail_email, ai_engine.config.gmail_password)
-                server.send_message(msg)
-                print(f"Reply sent to {to_email}")
-        except Exception as e:
-            print(f"SMTP Error: {e}")
+        msg = MIMEText(body)
+        msg['Subject'] = f"Re: {subject}"
+        msg['From'] = ai_engine.config.gmail_email
+        msg['To'] = to_email
+
+        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+            server.login(ai_engine.config.gmail_email, ai_engine.config.gmail_password)
+            server.send_message(msg)
+            print(f"Reply sent to {to_email}")
+
+    def snapshot(self) -> dict:
+        return {
+            "connected": self.connected,
+            "mode": self.mode,
+            "processed": self.processed,
+            "unparsed": self.unparsed,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
 
 email_service = EmailBotService()
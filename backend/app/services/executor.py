@@ -0,0 +1,87 @@
+import time
+import asyncio
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from app.core.config import settings
+
+
+class BlockingExecutor:
+    """Bounded thread pool for CPU-bound and synchronous I/O stages.
+
+    Torch, NumPy and the Chroma client release the GIL in their hot loops,
+    so threads keep the models shared while the event loop stays free.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.running = 0
+        self.stages = defaultdict(lambda: {"calls": 0, "errors": 0, "wait_ms": 0.0, "max_wait_ms": 0.0, "run_ms": 0.0})
+
+    async def run(self, stage: str, fn, *args, **kwargs):
+        submitted = time.perf_counter()
+        timings = {}
+        state = {"dequeued": False}
+
+        def call():
+            started = time.perf_counter()
+            with self._lock:
+                self._dequeue(state)
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                timings["wait"] = started - submitted
+                timings["run"] = time.perf_counter() - started
+                with self._lock:
+                    self.running -= 1
+
+        with self._lock:
+            self.queued += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        except Exception:
+            self.stages[stage]["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                # Cancelled while still queued: call() may never run to count it.
+                self._dequeue(state)
+            self._record(stage, timings)
+
+    def _dequeue(self, state: dict):
+        if not state["dequeued"]:
+            state["dequeued"] = True
+            self.queued -= 1
+
+    def _record(self, stage: str, timings: dict):
+        if "wait" not in timings:
+            return
+        stats = self.stages[stage]
+        wait_ms = timings["wait"] * 1000
+        stats["calls"] += 1
+        stats["wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+        stats["run_ms"] += timings["run"] * 1000
+
+    def snapshot(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queued,
+            "running": self.running,
+            "stages": {
+                name: {
+                    "calls": s["calls"],
+                    "errors": s["errors"],
+                    "avg_wait_ms": round(s["wait_ms"] / s["calls"], 2) if s["calls"] else 0.0,
+                    "max_wait_ms": round(s["max_wait_ms"], 2),
+                    "avg_run_ms": round(s["run_ms"] / s["calls"], 2) if s["calls"] else 0.0,
+                }
+                for name, s in self.stages.items()
+            },
+        }
+
+blocking_executor = BlockingExecutor(settings.BLOCKING_POOL_WORKERS)
@@ -0,0 +1,127 @@
+import hashlib
+from collections import defaultdict
+import numpy as np
+
+LABEL_FIELDS = ("type", "priority", "category")
+
+
+class KNNTicketClassifier:
+    """Similarity-weighted kNN over embeddings of previously routed messages.
+
+    Confidence is the summed similarity of the neighbours voting for the
+    winning type divided by k, so it is high only when the neighbours are
+    both close and in agreement. Low-confidence messages go to the LLM
+    router, whose labels are then added back as new examples.
+
+    At most `max_examples` are kept; past that the oldest example is
+    overwritten by each new one.
+    """
+
+    def __init__(self, k: int = 7, min_confidence: float = 0.8, min_examples: int = 30, max_examples: int = 20000):
+        self.k = k
+        self.min_confidence = min_confidence
+        self.min_examples = min_examples
+        self.max_examples = max_examples
+        self.reset()
+
+    def reset(self):
+        # Rows [0, _count) of _matrix hold normalised embeddings; the array
+        # doubles in size until it reaches max_examples.
+        self._matrix = None
+        self._count = 0
+        self._oldest = 0
+        self.labels = []
+        self._keys = []
+        self.seen = set()
+        self.handled = 0
+        self.fallbacks = 0
+
+    def configure(self, k: int, min_confidence: float, min_examples: int):
+        self.k = k
+        self.min_confidence = min_confidence
+        self.min_examples = min_examples
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, text: str) -> bool:
+        return self._key(text) in self.seen
+
+    @staticmethod
+    def _key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def _next_row(self, dim: int) -> int:
+        if self._matrix is None:
+            self._matrix = np.empty((min(64, self.max_examples), dim), dtype=np.float32)
+        if self._count == len(self._matrix) and self._count < self.max_examples:
+            grown = np.empty((min(2 * self._count, self.max_examples), dim), dtype=np.float32)
+            grown[: self._count] = self._matrix[: self._count]
+            self._matrix = grown
+        if self._count < len(self._matrix):
+            self._count += 1
+            return self._count - 1
+        row = self._oldest
+        self._oldest = (row + 1) % self._count
+        return row
+
+    def add_examples(self, texts: list, embeddings: list, labels: list):
+        for text, embedding, label in zip(texts, embeddings, labels):
+            key = self._key(text)
+            if key in self.seen or not all(label.get(f) for f in LABEL_FIELDS):
+                continue
+            vector = np.asarray(embedding, dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            row = self._next_row(len(vector))
+            self._matrix[row] = vector / norm if norm else vector
+            label = {f: label[f] for f in LABEL_FIELDS}
+            if row < len(self.labels):
+                self.seen.discard(self._keys[row])
+                self.labels[row], self._keys[row] = label, key
+            else:
+                self.labels.append(label)
+                self._keys.append(key)
+            self.seen.add(key)
+
+    def predict(self, embedding):
+        if self._count < self.min_examples:
+            self.fallbacks += 1
+            return None
+
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        similarities = self._matrix[: self._count] @ (query / norm if norm else query)
+        k = min(self.k, self._count)
+        neighbours = np.argpartition(-similarities, k - 1)[:k]
+        weights = np.clip(similarities[neighbours], 0, None)
+
+        votes = defaultdict(float)
+        for i, w in zip(neighbours, weights):
+            votes[self.labels[i]["type"]] += w
+        ticket_type, weight = max(votes.items(), key=lambda x: x[1])
+        confidence = weight / k
+        if confidence < self.min_confidence:
+            self.fallbacks += 1
+            return None
+
+        result = {"type": ticket_type}
+        for field in ("priority", "category"):
+            field_votes = defaultdict(float)
+            for i, w in zip(neighbours, weights):
+                if self.labels[i]["type"] == ticket_type:
+                    field_votes[self.labels[i][field]] += w
+            result[field] = max(field_votes.items(), key=lambda x: x[1])[0]
+        result["router"] = "knn"
+        result["confidence"] = round(float(confidence), 3)
+        self.handled += 1
+        return result
+
+    def snapshot(self) -> dict:
+        total = self.handled + self.fallbacks
+        return {
+            "examples": self._count,
+            "max_examples": self.max_examples,
+            "handled": self.handled,
+            "fallbacks": self.fallbacks,
+            "handled_fraction": round(self.handled / total, 4) if total else 0.0,
+        }
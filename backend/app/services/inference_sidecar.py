@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import socket
+import struct
+import asyncio
+import argparse
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+from app.services.batching import MicroBatcher
+from app.services.model_loader import embed_queries, score_pairs
+
+# One process owns the embedding model and the reranker; API workers talk to
+# it over a Unix socket. Messages are a 4-byte big-endian length followed by
+# a JSON body: {"op", "model", "items"} -> {"result"} or {"error"}.
+
+HEADER = struct.Struct(">I")
+MAX_MODELS_PER_KIND = 2
+
+
+def encode_message(payload: dict) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    return HEADER.pack(len(body)) + body
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise ConnectionError("Inference sidecar closed the connection")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+class SidecarClient:
+    """Blocking client; each thread keeps its own connection to the sidecar."""
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.socket_path)
+            self._local.sock = sock
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def call(self, op: str, model: str, items: list) -> list:
+        # Every operation is idempotent, so a request is retried once on a
+        # fresh connection if the sidecar restarted in between.
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                sock.sendall(encode_message({"op": op, "model": model, "items": items}))
+                (size,) = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+                response = json.loads(_recv_exactly(sock, size))
+                break
+            except OSError:
+                self._close()
+                if attempt:
+                    raise
+        if "error" in response:
+            raise RuntimeError(f"Inference sidecar: {response['error']}")
+        return response["result"]
+
+
+class SidecarEmbeddings(Embeddings):
+    def __init__(self, model_name: str, client: SidecarClient = None):
+        self.model_name = model_name
+        self.client = client or SidecarClient(settings.INFERENCE_SIDECAR_SOCKET)
+
+    def embed_documents(self, texts: list) -> list:
+        return self.client.call("embed_documents", self.model_name, list(texts))
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_queries([text])[0]
+
+    def embed_queries(self, texts: list) -> list:
+        return self.client.call("embed_query", self.model_name, list(texts))
+
+
+class SidecarReranker:
+    def __init__(self, model_name: str, client: SidecarClient = None):
+        self.model_name = model_name
+        self.client = client or SidecarClient(settings.INFERENCE_SIDECAR_SOCKET)
+
+    def predict(self, pairs: list, batch_size: int = None, show_progress_bar: bool = False, **kwargs) -> np.ndarray:
+        return np.array(self.client.call("rerank", self.model_name, [list(p) for p in pairs]), dtype=np.float32)
+
+
+def embed_documents(embeddings, texts: list) -> list:
+    return embeddings.embed_documents(texts)
+
+
+class InferenceServer:
+    OPERATIONS = {
+        "embed_query": ("embeddings", embed_queries, "EMBED"),
+        "embed_documents": ("embeddings", embed_documents, "EMBED"),
+        "rerank": ("reranker", score_pairs, "RERANK"),
+    }
+
+    def __init__(self, socket_path: str):
+        self.socket_path = socket_path
+        self.models = {"embeddings": OrderedDict(), "reranker": OrderedDict()}
+        self.batchers = {}
+        self._load_lock = asyncio.Lock()
+        self.requests = 0
+        self.errors = 0
+
+    async def _model(self, kind: str, name: str):
+        models = self.models[kind]
+        if name not in models:
+            async with self._load_lock:
+                if name not in models:
+                    from app.services.model_loader import load_embeddings, load_reranker
+
+                    loader = load_embeddings if kind == "embeddings" else load_reranker
+                    print(f"Sidecar loading {kind}: {name}")
+                    models[name] = await asyncio.to_thread(loader, name)
+                    # Workers may still be on the previous model while a reload
+                    # rolls out, so the last few models of each kind stay loaded.
+                    while len(models) > MAX_MODELS_PER_KIND:
+                        evicted, _ = models.popitem(last=False)
+                        for key in [k for k in self.batchers if k[1] == evicted and self.OPERATIONS[k[0]][0] == kind]:
+                            del self.batchers[key]
+                        print(f"Sidecar unloaded {kind}: {evicted}")
+        models.move_to_end(name)
+        return models[name]
+
+    async def _batcher(self, op: str, name: str) -> MicroBatcher:
+        kind, fn, prefix = self.OPERATIONS[op]
+        model = await self._model(kind, name)
+        key = (op, name)
+        if key not in self.batchers:
+            self.batchers[key] = MicroBatcher(
+                op, lambda items, model=model, fn=fn: fn(model, items),
+                max_batch_size=getattr(settings, f"{prefix}_BATCH_SIZE"),
+                max_wait_ms=getattr(settings, f"{prefix}_BATCH_WAIT_MS"),
+            )
+        return self.batchers[key]
+
+    async def call(self, op: str, name: str, items: list) -> list:
+        if op not in self.OPERATIONS:
+            raise ValueError(f"Unknown operation: {op}")
+        if op == "rerank":
+            items = [tuple(p) for p in items]
+        batcher = await self._batcher(op, name)
+        return await batcher.submit_many(items)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    (size,) = HEADER.unpack(await reader.readexactly(HEADER.size))
+                    request = json.loads(await reader.readexactly(size))
+                except asyncio.IncompleteReadError:
+                    break
+                self.requests += 1
+                try:
+                    response = {"result": await self.call(request["op"], request["model"], request["items"])}
+                except Exception as e:
+                    self.errors += 1
+                    response = {"error": str(e)}
+                writer.write(encode_message(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def preload(self, embedding_model: str = None, reranker_model: str = None):
+        started = time.perf_counter()
+        if embedding_model:
+            await self._batcher("embed_documents", embedding_model)
+        if reranker_model:
+            await self._batcher("rerank", reranker_model)
+        print(f"Sidecar models ready in {time.perf_counter() - started:.1f}s")
+
+    async def serve(self, embedding_model: str = None, reranker_model: str = None):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        await self.preload(embedding_model, reranker_model)
+        server = await asyncio.start_unix_server(self.handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o660)
+        print(f"Inference sidecar listening on {self.socket_path}")
+        async with server:
+            await server.serve_forever()
+
+
+def _configured_models() -> tuple:
+    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    config_file = os.path.join(base_dir, "config.json")
+    if os.path.exists(config_file):
+        with open(config_file, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return config.get("embedding_model"), config.get("reranker_model")
+    return settings.EMBEDDING_MODEL, None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Shared embedding/reranker model server")
+    parser.add_argument("--socket", default=settings.INFERENCE_SIDECAR_SOCKET or "/tmp/cortex-inference.sock")
+    parser.add_argument("--embedding-model")
+    parser.add_argument("--reranker-model")
+    args = parser.parse_args()
+
+    embedding_model, reranker_model = _configured_models()
+    server = InferenceServer(args.socket)
+    asyncio.run(server.serve(args.embedding_model or embedding_model, args.reranker_model or reranker_model))
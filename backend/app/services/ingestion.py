@@ -0,0 +1,321 @@
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+from collections import OrderedDict
+from app.core.config import settings
+from app.services.ai_engine import ai_engine
+from app.services.executor import BlockingExecutor
+
+MAX_JOBS = 50
+
+
+def file_digest(path: str) -> tuple:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest(), os.path.getsize(path)
+
+
+def load_file(path: str, filename: str) -> list:
+    from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader, CSVLoader
+
+    suffix = os.path.splitext(filename)[1].lower()
+    if suffix == ".pdf":
+        loader = PyPDFLoader(path)
+    elif suffix in [".docx", ".doc"]:
+        loader = Docx2txtLoader(path)
+    elif suffix == ".txt":
+        loader = TextLoader(path)
+    elif suffix == ".csv":
+        loader = CSVLoader(path, encoding='utf-8')
+    else:
+        raise ValueError(f"Unsupported file type: {suffix or filename}")
+
+    docs = loader.load()
+    for d in docs:
+        d.metadata["source"] = filename
+    return docs
+
+
+def split_documents(docs: list) -> list:
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    return splitter.split_documents(docs)
+
+
+class FileTask:
+    def __init__(self, job, path: str, filename: str):
+        self.id = uuid.uuid4().hex
+        self.job = job
+        self.path = path
+        self.filename = filename
+        self.content_hash = None
+        self.size = None
+        self.plan = None
+        self.pending_batches = 0
+        self.written = []
+        self.failed = False
+        self.source_lock = None
+
+    def cleanup(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class IngestionJob:
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Keyed by FileTask id: one request may carry the same filename twice.
+        self.files = {}
+        self.chunks_planned = 0
+        self.chunks_to_embed = 0
+        self.chunks_embedded = 0
+        self.chunks_written = 0
+        self.chunks_reused = 0
+        self.changed = asyncio.Event()
+
+    def add_file(self, file_id: str, filename: str):
+        self.files[file_id] = {"filename": filename, "state": "queued", "error": None, "report": None}
+
+    def set_file(self, file_id: str, state: str, **fields):
+        self.files[file_id].update(state=state, **fields)
+        if self.started_at is None and state != "queued":
+            self.started_at = time.time()
+        if all(f["state"] in ("done", "skipped", "failed") for f in self.files.values()):
+            self.finished_at = time.time()
+        self.notify()
+
+    def notify(self):
+        # Wakes every SSE listener; each one re-arms by waiting on the new event.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    @property
+    def state(self) -> str:
+        states = [f["state"] for f in self.files.values()]
+        if self.finished_at is None:
+            return "queued" if self.started_at is None else "running"
+        return "failed" if all(s == "failed" for s in states) else "done"
+
+    def snapshot(self) -> dict:
+        now = self.finished_at or time.time()
+        elapsed = now - self.started_at if self.started_at else 0.0
+        rate = self.chunks_written / elapsed if elapsed > 0 else 0.0
+
+        # Files not split yet are assumed to need as many new chunks as the
+        # ones planned so far.
+        planned = [f for f in self.files.values() if f["state"] not in ("queued", "parsing", "splitting")]
+        unplanned = len(self.files) - len(planned)
+        per_file = self.chunks_to_embed / len(planned) if planned else 0.0
+        remaining = self.chunks_to_embed - self.chunks_written + unplanned * per_file
+        eta = remaining / rate if rate > 0 and self.finished_at is None else None
+
+        return {
+            "id": self.id,
+            "state": self.state,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "files": self.files,
+            "chunks": {
+                "planned": self.chunks_planned,
+                "to_embed": self.chunks_to_embed,
+                "embedded": self.chunks_embedded,
+                "written": self.chunks_written,
+                "reused": self.chunks_reused,
+            },
+            "chunks_per_second": round(rate, 2),
+            "eta_seconds": round(eta, 1) if eta is not None else None,
+        }
+
+
+class IngestionPipeline:
+    """parse -> split -> embed -> write, each stage with its own workers and
+    a bounded queue in front, so parsing the next file overlaps with
+    embedding the previous one and a slow stage backs up the ones before it."""
+
+    def __init__(self):
+        self.parse_pool = BlockingExecutor(settings.INGEST_PARSE_WORKERS)
+        self.split_pool = BlockingExecutor(settings.INGEST_SPLIT_WORKERS)
+        self.embed_pool = BlockingExecutor(settings.INGEST_EMBED_WORKERS)
+        self.write_pool = BlockingExecutor(settings.INGEST_WRITE_WORKERS)
+        self.jobs = OrderedDict()
+        # source -> (lock, tasks holding or waiting for it)
+        self._sources = {}
+        self._queues = None
+        self._workers = []
+
+    def _ensure_workers(self):
+        if self._queues is not None:
+            return
+        size = settings.INGEST_QUEUE_SIZE
+        self._queues = {stage: asyncio.Queue(maxsize=size) for stage in ("parse", "split", "embed", "write")}
+        stages = [
+            (self._parse_worker, settings.INGEST_PARSE_WORKERS),
+            (self._split_worker, settings.INGEST_SPLIT_WORKERS),
+            (self._embed_worker, settings.INGEST_EMBED_WORKERS),
+            (self._write_worker, settings.INGEST_WRITE_WORKERS),
+        ]
+        for worker, count in stages:
+            self._workers += [asyncio.create_task(worker()) for _ in range(count)]
+
+    async def submit(self, files: list) -> IngestionJob:
+        """`files` is a list of (temp_path, filename); the temp files are removed when done."""
+        self._ensure_workers()
+        job = IngestionJob()
+        tasks = [FileTask(job, path, filename) for path, filename in files]
+        for task in tasks:
+            job.add_file(task.id, task.filename)
+        self.jobs[job.id] = job
+        while len(self.jobs) > MAX_JOBS:
+            self.jobs.popitem(last=False)
+        asyncio.create_task(self._feed(tasks))
+        return job
+
+    async def _feed(self, tasks: list):
+        for task in tasks:
+            await self._queues["parse"].put(task)
+
+    async def _claim_source(self, task: FileTask):
+        """Serialises plan_ingest() .. finish_ingest() per source, across jobs,
+        so two uploads of one file never diff against the same old chunks."""
+        lock, users = self._sources.get(task.filename, (None, 0))
+        lock = lock or asyncio.Lock()
+        self._sources[task.filename] = (lock, users + 1)
+        await lock.acquire()
+        task.source_lock = lock
+
+    def _release_source(self, task: FileTask):
+        if task.source_lock is None:
+            return
+        task.source_lock.release()
+        task.source_lock = None
+        lock, users = self._sources[task.filename]
+        if users > 1:
+            self._sources[task.filename] = (lock, users - 1)
+        else:
+            del self._sources[task.filename]
+
+    async def _discard(self, task: FileTask, ids: list):
+        # finish_ingest() never ran, so nothing in the registry points at
+        # these chunks; left in place they could never be deleted.
+        try:
+            await ai_engine.discard_chunks(ids, self.write_pool)
+        except Exception as e:
+            print(f"Ingestion: could not remove {len(ids)} partial chunks of {task.filename}: {e}")
+
+    async def _fail(self, task: FileTask, error: Exception):
+        if task.failed:
+            return
+        task.failed = True
+        task.cleanup()
+        print(f"Ingestion: {task.filename} failed: {error}")
+        if task.written:
+            await self._discard(task, task.written)
+        self._release_source(task)
+        task.job.set_file(task.id, "failed", error=str(error))
+
+    async def _parse_worker(self):
+        while True:
+            task = await self._queues["parse"].get()
+            try:
+                task.job.set_file(task.id, "parsing")
+                task.content_hash, task.size = await self.parse_pool.run("ingest_hash", file_digest, task.path)
+                if await ai_engine.document_unchanged(task.filename, task.content_hash):
+                    # Same bytes as the indexed version: nothing to parse or embed.
+                    await self._claim_source(task)
+                    task.plan = await ai_engine.plan_ingest(task.filename, [], task.content_hash)
+                    if task.plan["unchanged"]:
+                        await self._finish(task, "skipped")
+                        continue
+                    # Another upload replaced it while this one waited; index these bytes after all.
+                    self._release_source(task)
+                docs = await self.parse_pool.run("ingest_parse", load_file, task.path, task.filename)
+                await self._queues["split"].put((task, docs))
+            except Exception as e:
+                await self._fail(task, e)
+
+    async def _split_worker(self):
+        while True:
+            task, docs = await self._queues["split"].get()
+            try:
+                task.job.set_file(task.id, "splitting")
+                chunks = await self.split_pool.run("ingest_split", split_documents, docs)
+                await self._claim_source(task)
+                task.plan = await ai_engine.plan_ingest(task.filename, chunks, task.content_hash)
+                job, plan = task.job, task.plan
+                job.chunks_planned += len(plan["documents"])
+                job.chunks_to_embed += len(plan["new_ids"])
+                job.chunks_reused += len(plan["kept_ids"])
+                job.set_file(task.id, "embedding")
+
+                new_ids = plan["new_ids"]
+                batches = await ai_engine.plan_batches([plan["documents"][i] for i in new_ids], self.split_pool)
+                task.pending_batches = len(batches)
+                if not batches:
+                    await self._finish(task)
+                for batch, lengths in batches:
+                    await self._queues["embed"].put((task, [new_ids[i] for i in batch], lengths))
+            except Exception as e:
+                await self._fail(task, e)
+
+    async def _embed_worker(self):
+        while True:
+            task, ids, lengths = await self._queues["embed"].get()
+            if task.failed:
+                continue
+            try:
+                docs = [task.plan["documents"][i] for i in ids]
+                embeddings = await ai_engine.embed_chunks(docs, lengths, self.embed_pool)
+                task.job.chunks_embedded += len(ids)
+                task.job.notify()
+                await self._queues["write"].put((task, ids, docs, embeddings))
+            except Exception as e:
+                await self._fail(task, e)
+
+    async def _write_worker(self):
+        while True:
+            task, ids, docs, embeddings = await self._queues["write"].get()
+            if task.failed:
+                continue
+            try:
+                # Recorded first, so a write that fails half way is cleaned up too.
+                task.written += ids
+                await ai_engine.write_chunks(ids, docs, embeddings, self.write_pool)
+                if task.failed:
+                    # Another batch failed while this one was being written.
+                    await self._discard(task, ids)
+                    continue
+                task.job.chunks_written += len(ids)
+                task.pending_batches -= 1
+                task.job.notify()
+                if task.pending_batches == 0:
+                    await self._finish(task)
+            except Exception as e:
+                await self._fail(task, e)
+
+    async def _finish(self, task: FileTask, state: str = "done"):
+        report = await ai_engine.finish_ingest(task.plan, task.size)
+        self._release_source(task)
+        task.cleanup()
+        print(f"Ingestion: {task.filename}: {report['embedded']} embedded, {report['reused']} reused, {report['removed']} removed")
+        task.job.set_file(task.id, state, report=report)
+
+    def snapshot(self) -> dict:
+        return {
+            "queues": {stage: q.qsize() for stage, q in (self._queues or {}).items()},
+            "parse_pool": self.parse_pool.snapshot(),
+            "split_pool": self.split_pool.snapshot(),
+            "embed_pool": self.embed_pool.snapshot(),
+            "write_pool": self.write_pool.snapshot(),
+        }
+
+
+ingestion_pipeline = IngestionPipeline()
@@ -0,0 +1,88 @@
+from app.core.config import settings
+
+# torch and the model libraries are imported on first load, so API workers
+# that use the inference sidecar can share the helpers below without them.
+
+FALLBACK_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+FALLBACK_RERANKER_MODEL = "BAAI/bge-reranker-v2-m3"
+
+
+def resolve_device(preference: str = None) -> str:
+    import torch
+
+    preference = preference or settings.INFERENCE_DEVICE
+    if preference != "auto":
+        return preference
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def quantize_int8(model):
+    # Dynamic quantization: int8 weights, activations quantized per batch,
+    # executed by the fbgemm/onednn CPU kernels.
+    import torch
+
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def _configure_cpu():
+    import torch
+
+    if settings.CPU_THREADS:
+        torch.set_num_threads(settings.CPU_THREADS)
+
+
+def load_embeddings(model_name: str, device: str = None, quantize: bool = None):
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    device = resolve_device(device)
+    quantize = settings.CPU_INT8_QUANTIZATION if quantize is None else quantize
+    try:
+         embeddings = HuggingFaceEmbeddings(
+            model_name=model_name,
+            model_kwargs={'device': device, 'trust_remote_code': True}
+        )
+    except Exception as e:
+        print(f"Failed to load user embedding model {model_name}, falling back to defaults: {e}")
+        embeddings = HuggingFaceEmbeddings(
+            model_name=FALLBACK_EMBEDDING_MODEL,
+            model_kwargs={'device': device}
+        )
+
+    if device == "cpu":
+        _configure_cpu()
+        if quantize:
+            quantize_int8(embeddings._client)
+    print(f"Embeddings on {device}{' (int8)' if device == 'cpu' and quantize else ''}")
+    return embeddings
+
+
+def load_reranker(model_name: str, device: str = None, quantize: bool = None):
+    from sentence_transformers import CrossEncoder
+
+    device = resolve_device(device)
+    quantize = settings.CPU_INT8_QUANTIZATION if quantize is None else quantize
+    try:
+       reranker = CrossEncoder(model_name, max_length=512, trust_remote_code=True, device=device)
+    except Exception:
+       print("Reranker load failed, fallback to BGE")
+       reranker = CrossEncoder(FALLBACK_RERANKER_MODEL, device=device)
+
+    if device == "cpu":
+        _configure_cpu()
+        if quantize:
+            quantize_int8(reranker.model)
+    print(f"Reranker on {device}{' (int8)' if device == 'cpu' and quantize else ''}")
+    return reranker
+
+
+def embed_queries(embeddings, texts: list) -> list:
+    if hasattr(embeddings, "embed_queries"):
+        return embeddings.embed_queries(texts)
+    # Models with a query prompt have to go through embed_query one by one.
+    if getattr(embeddings, "query_encode_kwargs", None):
+        return [embeddings.embed_query(t) for t in texts]
+    return embeddings.embed_documents(texts)
+
+
+def score_pairs(reranker, pairs: list) -> list:
+    return reranker.predict(pairs, batch_size=len(pairs), show_progress_bar=False).tolist()
@@ -0,0 +1,150 @@
+import time
+import asyncio
+from collections import deque
+from telegram.constants import ChatAction, MessageLimit
+from telegram.error import BadRequest, RetryAfter, TelegramError
+
+ESCALATE_MARKER = "[ESCALATE]"
+# Typing indicators expire after about five seconds.
+TYPING_REFRESH_SECONDS = 4
+
+
+def retry_seconds(error: RetryAfter) -> float:
+    retry_after = error.retry_after
+    return retry_after.total_seconds() if hasattr(retry_after, "total_seconds") else float(retry_after)
+
+
+class EditRateLimiter:
+    """Shared budget for message edits across all chats.
+
+    Telegram allows roughly one message per second per chat and about
+    thirty per second per bot. Intermediate edits are skipped rather than
+    delayed when the budget is spent; the final text is always sent.
+    """
+
+    def __init__(self, per_second: int = 25):
+        self.per_second = per_second
+        self._sent = deque()
+        self._paused_until = 0.0
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        if now < self._paused_until:
+            return False
+        while self._sent and now - self._sent[0] > 1.0:
+            self._sent.popleft()
+        if len(self._sent) >= self.per_second:
+            return False
+        self._sent.append(now)
+        return True
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class ProgressiveReply:
+    """One bot message that grows as answer tokens arrive.
+
+    The first chunk is posted as soon as there is something to show, later
+    chunks edit that message at most once per `interval` seconds, and
+    `finish` replaces it with the final text.
+    """
+
+    def __init__(self, bot, chat_id: int, limiter: EditRateLimiter, interval: float = 1.0, min_chars: int = 20):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.limiter = limiter
+        self.interval = interval
+        self.min_chars = min_chars
+        self.message = None
+        self.shown = ""
+        self.first_shown_at = None
+        self._last_edit = 0.0
+        self._typing = None
+
+    def start_typing(self):
+        self._typing = asyncio.create_task(self._keep_typing())
+
+    async def _keep_typing(self):
+        try:
+            while True:
+                await self.bot.send_chat_action(chat_id=self.chat_id, action=ChatAction.TYPING)
+                await asyncio.sleep(TYPING_REFRESH_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Telegram: typing action failed for {self.chat_id}: {e}")
+
+    def stop_typing(self):
+        if self._typing:
+            self._typing.cancel()
+            self._typing = None
+
+    @staticmethod
+    def presentable(text: str) -> str:
+        """Returns the part of `text` that can be shown so far.
+
+        Nothing is shown once the escalation marker appears, and a trailing
+        piece that may still grow into the marker is held back.
+        """
+        if ESCALATE_MARKER in text:
+            return ""
+        for size in range(min(len(ESCALATE_MARKER) - 1, len(text)), 0, -1):
+            if ESCALATE_MARKER.startswith(text[-size:]):
+                return text[:-size].rstrip()
+        return text
+
+    async def update(self, text: str):
+        text = self.presentable(text)
+        if len(text.strip()) < self.min_chars:
+            return
+        # The trailing ellipsis marks the answer as still being written.
+        text = text[: MessageLimit.MAX_TEXT_LENGTH - 1] + "…"
+        if self.message is not None and time.monotonic() - self._last_edit < self.interval:
+            return
+        if not self.limiter.try_acquire():
+            return
+        await self._show(text)
+
+    async def _show(self, text: str, final: bool = False):
+        try:
+            if self.message is None:
+                self.message = await self.bot.send_message(chat_id=self.chat_id, text=text)
+                self.first_shown_at = time.perf_counter()
+                self.stop_typing()
+            elif text != self.shown:
+                await self.bot.edit_message_text(chat_id=self.chat_id, message_id=self.message.message_id, text=text)
+            self.shown = text
+            self._last_edit = time.monotonic()
+        except RetryAfter as e:
+            self.limiter.pause(retry_seconds(e))
+            if not final:
+                return
+            await asyncio.sleep(retry_seconds(e))
+            await self._show(text, final=True)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return
+            if final:
+                raise
+            print(f"Telegram: partial reply to {self.chat_id} not shown: {e}")
+        except TelegramError as e:
+            # A lost intermediate edit is cosmetic; only the final text has to arrive.
+            if final:
+                raise
+            print(f"Telegram: partial reply to {self.chat_id} not shown: {e}")
+
+    async def finish(self, text: str):
+        """Shows `text` as the complete answer, spilling over into extra messages past Telegram's length limit."""
+        self.stop_typing()
+        if not text.strip():
+            # Telegram rejects empty messages; take back a partial answer instead.
+            if self.message is not None:
+                await self.bot.delete_message(chat_id=self.chat_id, message_id=self.message.message_id)
+                self.message = None
+            return
+        limit = MessageLimit.MAX_TEXT_LENGTH
+        parts = [text[i : i + limit] for i in range(0, len(text), limit)]
+        await self._show(parts[0], final=True)
+        for part in parts[1:]:
+            await self.bot.send_message(chat_id=self.chat_id, text=part)
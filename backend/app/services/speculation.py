@@ -0,0 +1,55 @@
+import time
+import asyncio
+
+
+class SpeculativeTask:
+    """Runs a coroutine ahead of the decision that tells whether it is needed."""
+
+    def __init__(self, coro):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.task = asyncio.create_task(self._run(coro))
+
+    async def _run(self, coro):
+        try:
+            return await coro
+        finally:
+            self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+
+class SpeculationStats:
+    def __init__(self):
+        self.used = 0
+        self.wasted = 0
+        self.saved_seconds = 0.0
+        self.wasted_seconds = 0.0
+
+    async def use(self, speculative: SpeculativeTask, decided_after: float):
+        result = await speculative.task
+        # Run sequentially, retrieval would have started only after the
+        # decision; in parallel the two overlap.
+        self.used += 1
+        self.saved_seconds += min(decided_after, speculative.elapsed)
+        return result
+
+    def discard(self, speculative: SpeculativeTask):
+        if not speculative.task.done():
+            speculative.task.cancel()
+        elif not speculative.task.cancelled():
+            # Consume the outcome so a failed retrieval is not reported as unhandled.
+            speculative.task.exception()
+        self.wasted += 1
+        self.wasted_seconds += speculative.elapsed
+
+    def snapshot(self) -> dict:
+        return {
+            "used": self.used,
+            "wasted": self.wasted,
+            "latency_saved_seconds": round(self.saved_seconds, 3),
+            "avg_latency_saved_ms": round(self.saved_seconds / self.used * 1000, 1) if self.used else 0.0,
+            "wasted_retrieval_seconds": round(self.wasted_seconds, 3),
+        }
@@ -1,7 +1,14 @@
 import asyncio
+import time
+import hmac
+import secrets
 from telegram import Update
 from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
 from app.services.ai_engine import ai_engine
+from app.services.chat_dispatcher import ChatDispatcher
+from app.services.metrics import LatencyTracker
+from app.services.progressive_reply import EditRateLimiter, ProgressiveReply
+from app.services.translation import translation_service
 import logging
 
 logging.basicConfig(
@@ -14,15 +21,31 @@ class TelegramBotService:
         self.application = None
         self.is_running = False
         self._task = None
+        self.dispatcher = None
+        self.mode = None
+        self.webhook_secret = None
+        self.edit_limiter = EditRateLimiter()
+        self.first_message = LatencyTracker()
 
     async def start(self):
-        token = ai_engine.config.telegram_token
-        if not token or not ai_engine.config.telegram_enabled:
+        config = ai_engine.config
+        token = config.telegram_token
+        if not token or not config.telegram_enabled:
             print("Telegram Service: Disabled or No Token")
             return
+        webhook = config.telegram_mode == "webhook"
+        if webhook and not config.telegram_webhook_url:
+            print("Telegram Service: Webhook mode needs telegram_webhook_url")
+            return
 
         print("Telegram Service: Starting...")
-        self.application = ApplicationBuilder().token(token).build()
+        builder = ApplicationBuilder().token(token)
+        if config.telegram_api_base_url:
+            builder = builder.base_url(config.telegram_api_base_url)
+        if webhook:
+            # Updates arrive through the FastAPI webhook route instead of a long-poll loop.
+            builder = builder.updater(None)
+        self.application = builder.build()
         
         start_handler = CommandHandler('start', self.start_command)
         message_handler = MessageHandler(filters.TEXT & (~filters.COMMAND), self.handle_message)
@@ -30,73 +53,160 @@ class TelegramBotService:
         self.application.add_handler(start_handler)
         self.application.add_handler(message_handler)
 
+        # Updates are still read one at a time; handle_message only queues
+        # them, so one slow answer no longer holds up every other chat.
+        self.dispatcher = ChatDispatcher(
+            self.process_message,
+            max_concurrency=config.telegram_max_concurrency,
+            max_backlog=config.telegram_chat_backlog,
+            overflow=config.telegram_chat_overflow,
+            merge=self.merge_messages,
+        )
+
         self.is_running = True
         
         await self.application.initialize()
         await self.application.start()
         
-        await self.application.updater.start_polling()
-        print("Telegram Service: Polling started")
+        if webhook:
+            self.webhook_secret = config.telegram_webhook_secret or secrets.token_urlsafe(32)
+            await self.application.bot.set_webhook(
+                url=config.telegram_webhook_url, secret_token=self.webhook_secret, allowed_updates=Update.ALL_TYPES
+            )
+            self.mode = "webhook"
+            print(f"Telegram Service: Webhook set to {config.telegram_webhook_url}")
+        else:
+            # start_polling also removes any webhook left from webhook mode.
+            await self.application.updater.start_polling()
+            self.mode = "polling"
+            print("Telegram Service: Polling started")
 
     async def stop(self):
         if self.application and self.is_running:
-            await self.application.updater.stop()
+            if self.application.updater:
+                await self.application.updater.stop()
+            if self.mode == "webhook":
+                # Otherwise Telegram keeps posting to the route, and polling mode cannot start.
+                try:
+                    await self.application.bot.delete_webhook()
+                except Exception as e:
+                    print(f"Telegram Service: could not delete webhook: {e}")
+            await self.dispatcher.close()
             await self.application.stop()
             await self.application.shutdown()
             self.is_running = False
+            self.mode = None
             print("Telegram Service: Stopped")
 
+    async def restart(self):
+        await self.stop()
+        await self.start()
+
+    @property
+    def accepts_webhook(self) -> bool:
+        return self.is_running and self.mode == "webhook"
+
+    def check_webhook_secret(self, secret: str) -> bool:
+        # Compared as bytes: compare_digest rejects non-ASCII str.
+        return bool(secret) and hmac.compare_digest(secret.encode("utf-8"), self.webhook_secret.encode("utf-8"))
+
+    def enqueue_update(self, data: dict):
+        """Hands a webhook update to the application's update queue without waiting for it to be handled.
+
+        Raises ValueError if `data` is not an update.
+        """
+        if not isinstance(data, dict):
+            raise ValueError("Update must be a JSON object")
+        try:
+            update = Update.de_json(data, self.application.bot)
+        except Exception as e:
+            raise ValueError(f"Invalid update: {e}") from e
+        if update is None:
+            raise ValueError("Empty update")
+        self.application.update_queue.put_nowait(update)
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         await context.bot.send_message(chat_id=update.effective_chat.id, text="Hello! I am your AI Assistant. How can I help you today?")
 
     async def handle_message(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        user_text = update.message.text
         chat_id = update.effective_chat.id
-        
-        print(f"Telegram received: {user_text}")
-        
+        print(f"Telegram received: {update.message.text}")
+        item = {"text": update.message.text, "bot": context.bot, "received_at": time.perf_counter()}
+        if not self.dispatcher.submit(chat_id, item):
+            print(f"Telegram: dropped message from {chat_id}, backlog full")
+
+    @staticmethod
+    def merge_messages(pending: dict, new: dict) -> dict:
+        # A burst of short messages usually is one question typed in pieces.
+        return dict(pending, text=pending["text"] + "\n" + new["text"])
+
+    async def _answer(self, text: str, reply: ProgressiveReply) -> dict:
+        if not ai_engine.config.telegram_stream_replies:
+            return await ai_engine.process_incoming_request(text, "telegram")
+        answer, result = "", None
+        async for event, data in ai_engine.stream_incoming_request(text, "telegram"):
+            if event == "token":
+                answer += data
+                await reply.update(answer)
+            elif event == "done":
+                result = data
+        return result
+
+    async def process_message(self, chat_id: int, item: dict):
+        user_text = item["text"]
+        bot = item["bot"]
+        interval = ai_engine.config.telegram_edit_interval_ms / 1000
+        reply = ProgressiveReply(bot, chat_id, self.edit_limiter, interval=interval)
+        reply.start_typing()
+
         try:
-             result = await ai_engine.process_incoming_request(user_text, "telegram")
+             result = await self._answer(user_text, reply)
+             latency_ms = (time.perf_counter() - item["received_at"]) * 1000
              
              action = result.get("action")
              response_text = result.get("response", "")
              
              if action == "escalate" or "[ESCALATE]" in response_text:
-                 from deep_translator import GoogleTranslator
-                 
-                 try:
-                     tr_en = GoogleTranslator(source='auto', target='en').translate(user_text)
-                     tr_ru = GoogleTranslator(source='auto', target='ru').translate(user_text)
-                     tr_kk = GoogleTranslator(source='auto', target='kk').translate(user_text)
-                 except:
-                     tr_en, tr_ru, tr_kk = user_text, user_text, user_text
-                 
                  from app.api.endpoints.ingest import LogEntry, ingest_log
-                 await ingest_log(LogEntry(
+                 entry = LogEntry(
                      text=user_text,
                      source="telegram",
                      status="pending",
                      contact_info={"chat_id": chat_id},
-                     translations={"en": tr_en, "ru": tr_ru, "kk": tr_kk},
-                     result={"action": "escalate", "response": "Ticket created"}
-                 ))
+                     result={"action": "escalate", "response": "Ticket created"},
+                     latency_ms=latency_ms
+                 )
+                 await ingest_log(entry)
                  
-                 await context.bot.send_message(chat_id=chat_id, text="I am forwarding your request to a human operator. Please wait.")
+                 await reply.finish("I am forwarding your request to a human operator. Please wait.")
+                 translation_service.translate_ticket(entry.id, user_text)
              
              elif action == "auto_reply":
                  from app.api.endpoints.ingest import LogEntry, ingest_log
                  await ingest_log(LogEntry(
                      text=user_text,
                      source="telegram",
-                     result={"action": "auto_reply", "response": response_text}
+                     result={"action": "auto_reply", "response": response_text},
+                     latency_ms=latency_ms
                  ))
-                 await context.bot.send_message(chat_id=chat_id, text=response_text)
+                 await reply.finish(response_text)
                  
              elif action == "ignore":
                  print(f"Telegram: Ignored spam from {chat_id}")
 
         except Exception as e:
-            await context.bot.send_message(chat_id=chat_id, text="Sorry, I encountered an error.")
+            await reply.finish("Sorry, I encountered an error.")
             print(f"Telegram Error: {e}")
+        finally:
+            reply.stop_typing()
+            if reply.first_shown_at is not None:
+                self.first_message.record(reply.first_shown_at - item["received_at"])
+
+    def snapshot(self) -> dict:
+        return {
+            "mode": self.mode,
+            "dispatcher": self.dispatcher.snapshot() if self.dispatcher else None,
+            "time_to_first_message": self.first_message.snapshot(),
+        }
 
 telegram_service = TelegramBotService()
@@ -0,0 +1,265 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from app.core.config import settings
+from app.services import analytics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tickets (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    timestamp REAL NOT NULL,
+    source TEXT,
+    status TEXT,
+    rating TEXT,
+    action TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tickets_status ON tickets (status, seq);
+CREATE INDEX IF NOT EXISTS tickets_source ON tickets (source, seq);
+CREATE INDEX IF NOT EXISTS tickets_rating ON tickets (rating, seq);
+CREATE INDEX IF NOT EXISTS tickets_action ON tickets (action, seq);
+CREATE INDEX IF NOT EXISTS tickets_timestamp ON tickets (timestamp);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+MIGRATION_KEY = "migrated_feedback_json"
+ROLLUPS_KEY = "rollups_built"
+PRUNE_INTERVAL = 3600
+
+
+class TicketStore:
+    """Tickets and feedback entries in SQLite (WAL).
+
+    Each entry is kept as JSON in `data`; the fields that are filtered on
+    (id, timestamp, source, status, rating, action) are mirrored into
+    indexed columns. Appends and point updates are single short
+    transactions, so the Telegram, email and HTTP paths can write
+    concurrently without losing updates. Analytics rollups are updated in
+    the same transactions.
+    """
+
+    def __init__(self, path: str, legacy_file: str = None):
+        self.path = path
+        self.legacy_file = legacy_file
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+        self._last_prune = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            if not self._initialized:
+                with self._init_lock:
+                    if not self._initialized:
+                        conn.executescript(SCHEMA + analytics.SCHEMA)
+                        self._build_rollups(conn)
+                        self._migrate(conn)
+                        self._initialized = True
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    @staticmethod
+    def _columns(entry: dict) -> tuple:
+        return (
+            entry["id"],
+            entry.get("timestamp") or 0.0,
+            entry.get("source"),
+            entry.get("status"),
+            entry.get("rating"),
+            (entry.get("result") or {}).get("action"),
+            json.dumps(entry, ensure_ascii=False),
+        )
+
+    @staticmethod
+    def _rollup_key(entry: dict) -> tuple:
+        return entry.get("timestamp"), entry.get("source"), (entry.get("result") or {}).get("action")
+
+    def _insert(self, conn: sqlite3.Connection, entries: list):
+        for entry in entries:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO tickets (id, timestamp, source, status, rating, action, data) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                self._columns(entry),
+            )
+            if cursor.rowcount:
+                analytics.record(conn, entry)
+
+    def _build_rollups(self, conn: sqlite3.Connection):
+        # Databases created before the rollups existed are backfilled once.
+        with _Transaction(conn):
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (ROLLUPS_KEY,)).fetchone():
+                return
+            analytics.clear(conn)
+            for (data,) in conn.execute("SELECT data FROM tickets ORDER BY seq").fetchall():
+                analytics.record(conn, json.loads(data))
+            analytics.prune(conn)
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (ROLLUPS_KEY, "1"))
+
+    def _migrate(self, conn: sqlite3.Connection):
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        with _Transaction(conn):
+            if conn.execute("SELECT 1 FROM meta WHERE key = ?", (MIGRATION_KEY,)).fetchone():
+                return
+            try:
+                with open(self.legacy_file, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except Exception as e:
+                print(f"Ticket store: could not read {self.legacy_file}, skipping migration: {e}")
+                entries = []
+            for entry in entries:
+                entry.setdefault("id", str(uuid.uuid4()))
+            self._insert(conn, entries)
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)", (MIGRATION_KEY, str(len(entries))))
+        print(f"Ticket store: migrated {len(entries)} entries from {self.legacy_file}")
+
+    def append(self, entry: dict):
+        self.append_many([entry])
+
+    def append_many(self, entries: list):
+        with self._transaction() as conn:
+            self._insert(conn, entries)
+            now = time.time()
+            if now - self._last_prune > PRUNE_INTERVAL:
+                self._last_prune = now
+                analytics.prune(conn, now)
+
+    def get(self, entry_id: str) -> dict:
+        row = self._connect().execute("SELECT data FROM tickets WHERE id = ?", (entry_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_meta(self, key: str):
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key: str, value):
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def update(self, entry_id: str, changes: dict) -> dict:
+        """Shallow-merge `changes` into the entry; returns the updated entry or None."""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT data FROM tickets WHERE id = ?", (entry_id,)).fetchone()
+            if not row:
+                return None
+            previous = json.loads(row[0])
+            entry = dict(previous, **changes)
+            columns = self._columns(entry)
+            if self._rollup_key(previous) != self._rollup_key(entry):
+                analytics.record(conn, previous, sign=-1, latency=False)
+                analytics.record(conn, entry, latency=False)
+            conn.execute(
+                "UPDATE tickets SET timestamp = ?, source = ?, status = ?, rating = ?, action = ?, data = ? WHERE id = ?",
+                columns[1:] + (entry_id,),
+            )
+        return entry
+
+    @staticmethod
+    def _where(filters: dict) -> tuple:
+        clauses, params = [], []
+        for column in ("status", "source", "rating", "action"):
+            if filters.get(column) is not None:
+                clauses.append(f"{column} = ?")
+                params.append(filters[column])
+        if filters.get("unrated"):
+            clauses.append("rating IS NULL")
+        if filters.get("source_not") is not None:
+            clauses.append("(source IS NULL OR source != ?)")
+            params.append(filters["source_not"])
+        if filters.get("since") is not None:
+            clauses.append("timestamp >= ?")
+            params.append(filters["since"])
+        if filters.get("until") is not None:
+            clauses.append("timestamp < ?")
+            params.append(filters["until"])
+        if filters.get("q"):
+            pattern = "%" + filters["q"].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            clauses.append(
+                "(json_extract(data, '$.text') LIKE ? ESCAPE '\\' OR json_extract(data, '$.result.response') LIKE ? ESCAPE '\\')"
+            )
+            params.extend([pattern, pattern])
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def iter(self, newest_first: bool = False, **filters):
+        where, params = self._where(filters)
+        order = "DESC" if newest_first else "ASC"
+        cursor = self._connect().execute(f"SELECT data FROM tickets{where} ORDER BY seq {order}", params)
+        for (data,) in cursor:
+            yield json.loads(data)
+
+    def list(self, limit: int = None, newest_first: bool = False, **filters) -> list:
+        where, params = self._where(filters)
+        order = "DESC" if newest_first else "ASC"
+        sql = f"SELECT data FROM tickets{where} ORDER BY seq {order}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(data) for (data,) in self._connect().execute(sql, params)]
+
+    def page(self, limit: int, cursor: int = None, newest_first: bool = True, **filters) -> tuple:
+        """Keyset pagination on seq; returns (entries, next_cursor or None)."""
+        where, params = self._where(filters)
+        if cursor is not None:
+            where += (" AND " if where else " WHERE ") + ("seq < ?" if newest_first else "seq > ?")
+            params.append(cursor)
+        order = "DESC" if newest_first else "ASC"
+        rows = self._connect().execute(
+            f"SELECT seq, data FROM tickets{where} ORDER BY seq {order} LIMIT ?", params + [limit + 1]
+        ).fetchall()
+        next_cursor = rows[limit - 1][0] if len(rows) > limit else None
+        return [json.loads(data) for _, data in rows[:limit]], next_cursor
+
+    def scan(self, batch_size: int = 500, **filters):
+        """Yields entries oldest first in batches, one short query per batch."""
+        cursor = None
+        while True:
+            batch, cursor = self.page(batch_size, cursor, newest_first=False, **filters)
+            if batch:
+                yield batch
+            if cursor is None:
+                return
+
+    def count(self, **filters) -> int:
+        where, params = self._where(filters)
+        return self._connect().execute(f"SELECT COUNT(*) FROM tickets{where}", params).fetchone()[0]
+
+    def clear(self):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM tickets")
+            analytics.clear(conn)
+
+    def analytics_summary(self, range_key: str = analytics.ALL, source: str = None, source_not: str = None) -> dict:
+        return analytics.summary(self._connect(), range_key, source=source, source_not=source_not)
+
+
+class _Transaction:
+    # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write
+    # updates never interleave with another writer.
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+ticket_store = TicketStore(settings.TICKET_DB_PATH, legacy_file=settings.LEGACY_FEEDBACK_FILE)
@@ -0,0 +1,129 @@
+import sys
+import threading
+
+# Ingestion embeds whole documents at once, so batches are formed by padded
+# token count instead of chunk count: chunks are sorted by length, and a
+# batch is closed once (size x longest chunk) would exceed the budget, or once
+# more than MAX_PADDING of it would be padding. Short chunks then travel in
+# large batches, long ones in small batches, and very little compute is
+# spent on padding.
+
+CHARS_PER_TOKEN = 4
+MAX_PADDING = 0.5
+
+
+def token_lengths(embeddings, texts: list) -> list:
+    client = getattr(embeddings, "_client", None)
+    tokenizer = getattr(client, "tokenizer", None)
+    if tokenizer is None:
+        return [len(t) // CHARS_PER_TOKEN + 2 for t in texts]
+    max_length = getattr(client, "max_seq_length", None) or 512
+    encoded = tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+    return [len(ids) for ids in encoded]
+
+
+def token_budget_batches(lengths: list, budget: int, max_batch_size: int) -> list:
+    """Groups indices into batches whose padded size stays within `budget` tokens."""
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batches, batch, tokens = [], [], 0
+    for i in order:
+        # Sorted ascending, so the incoming chunk is the new longest.
+        length = max(lengths[i], 1)
+        padded = (len(batch) + 1) * length
+        if batch and (padded > budget or len(batch) >= max_batch_size or tokens + length < padded * (1 - MAX_PADDING)):
+            batches.append(batch)
+            batch, tokens = [], 0
+        batch.append(i)
+        tokens += length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def encode_batch(embeddings, texts: list) -> list:
+    """Embeds `texts` as one model batch where the backend allows it."""
+    client = getattr(embeddings, "_client", None)
+    if client is None or not hasattr(client, "encode"):
+        return embeddings.embed_documents(texts)
+    # Mirrors HuggingFaceEmbeddings.embed_documents, minus its fixed inner batch size.
+    texts = [t.replace("\n", " ") for t in texts]
+    kwargs = dict(getattr(embeddings, "encode_kwargs", None) or {})
+    kwargs["batch_size"] = len(texts)
+    return client.encode(texts, show_progress_bar=False, **kwargs).tolist()
+
+
+def is_out_of_memory(error: BaseException) -> bool:
+    return type(error).__name__ == "OutOfMemoryError" or "out of memory" in str(error).lower()
+
+
+def _release_memory():
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class AdaptiveTokenBudget:
+    """Token budget that halves on out-of-memory and creeps back up after a
+    run of successful batches."""
+
+    def __init__(self, budget: int, max_batch_size: int, min_budget: int = 512, recover_after: int = 20):
+        self.max_budget = budget
+        self.budget = budget
+        self.max_batch_size = max_batch_size
+        self.min_budget = min_budget
+        self.recover_after = recover_after
+        self._lock = threading.Lock()
+        # The budget is sized for one batch on the device at a time.
+        self._model_lock = threading.Lock()
+        self._streak = 0
+        self.batches = 0
+        self.chunks = 0
+        self.padded_tokens = 0
+        self.tokens = 0
+        self.ooms = 0
+
+    def batches_for(self, lengths: list) -> list:
+        return token_budget_batches(lengths, self.budget, self.max_batch_size)
+
+    def _shrink(self):
+        with self._lock:
+            self.ooms += 1
+            self._streak = 0
+            self.budget = max(self.min_budget, self.budget // 2)
+
+    def _succeeded(self, lengths: list):
+        with self._lock:
+            self.batches += 1
+            self.chunks += len(lengths)
+            self.tokens += sum(lengths)
+            self.padded_tokens += len(lengths) * max(lengths)
+            self._streak += 1
+            if self._streak >= self.recover_after and self.budget < self.max_budget:
+                self.budget = min(self.max_budget, self.budget + self.budget // 4)
+                self._streak = 0
+
+    def embed(self, embeddings, texts: list, lengths: list) -> list:
+        """Embeds one batch; on OOM shrinks the budget and retries in halves."""
+        try:
+            with self._model_lock:
+                vectors = encode_batch(embeddings, texts)
+        except Exception as e:
+            if not is_out_of_memory(e) or len(texts) == 1:
+                raise
+            _release_memory()
+            self._shrink()
+            print(f"Embedding OOM on {len(texts)} chunks, token budget now {self.budget}")
+            half = len(texts) // 2
+            return self.embed(embeddings, texts[:half], lengths[:half]) + self.embed(embeddings, texts[half:], lengths[half:])
+        self._succeeded(lengths)
+        return vectors
+
+    def snapshot(self) -> dict:
+        return {
+            "token_budget": self.budget,
+            "max_token_budget": self.max_budget,
+            "batches": self.batches,
+            "avg_batch_size": round(self.chunks / self.batches, 2) if self.batches else 0.0,
+            "padding_ratio": round(1 - self.tokens / self.padded_tokens, 3) if self.padded_tokens else 0.0,
+            "ooms": self.ooms,
+        }
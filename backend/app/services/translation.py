@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+from collections import OrderedDict
+from app.core.config import settings
+from app.services.executor import BlockingExecutor, blocking_executor
+from app.services.ticket_store import ticket_store
+
+# The operator console shows these three side by side.
+LANGUAGES = ("en", "ru", "kk")
+
+
+class GoogleTranslatorBackend:
+    """deep_translator's GoogleTranslator; each call is a blocking HTTP request."""
+
+    def translate(self, text: str, target: str) -> str:
+        from deep_translator import GoogleTranslator
+
+        return GoogleTranslator(source='auto', target=target).translate(text)
+
+
+class LocalTranslatorBackend:
+    """Offline stand-in that tags the text with the target language."""
+
+    def translate(self, text: str, target: str) -> str:
+        return f"[{target}] {text}"
+
+
+BACKENDS = {"google": GoogleTranslatorBackend, "local": LocalTranslatorBackend}
+
+
+class TranslationService:
+    """Translates escalated tickets off the request path.
+
+    Target languages are translated concurrently on a small dedicated
+    pool, results are cached by text hash, and identical requests in
+    flight share one call.
+    """
+
+    def __init__(self, backend, max_workers: int = 4, cache_size: int = 2048):
+        self.backend = backend
+        self.pool = BlockingExecutor(max_workers)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._tasks = set()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    @staticmethod
+    def _key(text: str, target: str) -> tuple:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest(), target
+
+    async def translate(self, text: str, target: str) -> str:
+        key = self._key(text, target)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return self._cache[key]
+        if key in self._inflight:
+            self.hits += 1
+            return await asyncio.shield(self._inflight[key])
+
+        self.misses += 1
+        future = asyncio.ensure_future(self.pool.run("translate", self.backend.translate, text, target))
+        self._inflight[key] = future
+        try:
+            translated = await asyncio.shield(future)
+        finally:
+            self._inflight.pop(key, None)
+        self._cache[key] = translated
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return translated
+
+    async def translate_all(self, text: str, languages=LANGUAGES) -> dict:
+        """Returns {language: translation}; a failed language falls back to the original text."""
+        results = await asyncio.gather(*(self.translate(text, lang) for lang in languages), return_exceptions=True)
+        translations = {}
+        for lang, result in zip(languages, results):
+            if isinstance(result, Exception):
+                self.failures += 1
+                print(f"Translation to {lang} failed: {result}")
+                result = text
+            translations[lang] = result
+        return translations
+
+    def translate_ticket(self, entry_id: str, text: str):
+        """Fills in the ticket's translations in the background."""
+        task = asyncio.create_task(self._translate_ticket(entry_id, text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _translate_ticket(self, entry_id: str, text: str):
+        translations = await self.translate_all(text)
+        try:
+            await blocking_executor.run("ticket_store", ticket_store.update, entry_id, {"translations": translations})
+        except Exception as e:
+            print(f"Translation: could not update ticket {entry_id}: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "failures": self.failures,
+            "cached": len(self._cache),
+            "pending_tickets": len(self._tasks),
+            "pool": self.pool.snapshot(),
+        }
+
+
+translation_service = TranslationService(BACKENDS[settings.TRANSLATION_BACKEND](), settings.TRANSLATION_WORKERS)
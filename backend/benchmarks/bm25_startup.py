@@ -0,0 +1,94 @@
+"""Startup time and RSS of the BM25 index against corpus size.
+
+Compares the legacy path (rebuilding an in-memory index from every chunk
+text at boot) with opening the memory-mapped snapshot.
+
+    python -m benchmarks.bm25_startup --sizes 10000 50000 100000
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def make_corpus(size: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    vocab = [f"term{i}" for i in range(50000)]
+    weights = [1 / (rank + 1) for rank in range(len(vocab))]
+    return {
+        f"chunk-{i:08d}": " ".join(rng.choices(vocab, weights=weights, k=rng.randint(60, 220)))
+        for i in range(size)
+    }
+
+
+def measure(mode: str, corpus_path: str, index_dir: str) -> dict:
+    # Import cost is excluded so both modes measure only index startup.
+    from app.services.bm25_index import BM25Index, LexicalIndex
+
+    base_rss = rss_mb()
+    started = time.perf_counter()
+    if mode == "rebuild":
+        with open(corpus_path, "r", encoding="utf-8") as f:
+            corpus = json.load(f)
+        index = BM25Index()
+        index.add(list(corpus), list(corpus.values()))
+    else:
+        index = LexicalIndex(index_dir)
+        index.open()
+    ready = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index.search("term1 term42 term977 term12000", k=10)
+    first_query = time.perf_counter() - started
+
+    return {"startup_s": ready, "first_query_ms": first_query * 1000, "rss_mb": rss_mb() - base_rss}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000])
+    parser.add_argument("--child", nargs=3, metavar=("MODE", "CORPUS", "INDEX"))
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(*args.child)))
+        return
+
+    from app.services.bm25_index import LexicalIndex
+
+    print(f"{'chunks':>8} {'mode':>9} {'startup_s':>10} {'query_ms':>9} {'rss_mb':>8}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            corpus = make_corpus(size)
+            corpus_path = os.path.join(tmp, "corpus.json")
+            with open(corpus_path, "w", encoding="utf-8") as f:
+                json.dump(corpus, f)
+
+            index = LexicalIndex(os.path.join(tmp, "bm25"))
+            index.add(list(corpus), list(corpus.values()))
+            index.save()
+            del index, corpus
+
+            for mode in ("rebuild", "mmap"):
+                out = subprocess.check_output(
+                    [sys.executable, "-m", "benchmarks.bm25_startup", "--child", mode, corpus_path, os.path.join(tmp, "bm25")],
+                    cwd=BACKEND_DIR,
+                )
+                r = json.loads(out)
+                print(f"{size:>8} {mode:>9} {r['startup_s']:>10.3f} {r['first_query_ms']:>9.2f} {r['rss_mb']:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""fp32 vs int8 CPU inference for the embedding model and the reranker.
+
+Reports query latency, batch throughput and how often the quantized
+models agree with fp32 on retrieval top-k and rerank top-3.
+
+    python -m benchmarks.cpu_inference --corpus passages.txt --queries queries.txt
+
+Without arguments the corpus is the style example text from config.json
+and the queries are the messages stored in the ticket store.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.model_loader import load_embeddings, load_reranker
+from app.services.ticket_store import ticket_store
+
+
+def read_lines(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def default_corpus() -> tuple:
+    with open(os.path.join(BACKEND_DIR, "config.json"), "r", encoding="utf-8") as f:
+        config = json.load(f)
+    feedback = ticket_store.list()
+    passages = [line.strip() for line in config.get("style_example_text", "").splitlines() if line.strip()]
+    queries = list(dict.fromkeys(d["text"] for d in feedback if d.get("text")))
+    return passages, queries, config["embedding_model"], config["reranker_model"]
+
+
+def bench(label: str, embeddings, reranker, passages: list, queries: list, k: int, batch_size: int) -> dict:
+    embeddings.embed_query(queries[0])
+
+    latencies = []
+    query_vectors = []
+    for q in queries:
+        started = time.perf_counter()
+        query_vectors.append(embeddings.embed_query(q))
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    doc_vectors = []
+    for i in range(0, len(passages), batch_size):
+        doc_vectors.extend(embeddings.embed_documents(passages[i : i + batch_size]))
+    throughput = len(passages) / (time.perf_counter() - started)
+
+    q = np.asarray(query_vectors)
+    d = np.asarray(doc_vectors)
+    q /= np.linalg.norm(q, axis=1, keepdims=True)
+    d /= np.linalg.norm(d, axis=1, keepdims=True)
+    top_k = np.argsort(-(q @ d.T), axis=1)[:, :k]
+
+    rerank_latencies = []
+    rerank_top = []
+    for qi, query in enumerate(queries):
+        candidates = [passages[i] for i in top_k[qi]]
+        started = time.perf_counter()
+        scores = reranker.predict([(query, p) for p in candidates], batch_size=len(candidates), show_progress_bar=False)
+        rerank_latencies.append(time.perf_counter() - started)
+        rerank_top.append([int(top_k[qi][i]) for i in np.argsort(-scores)[:3]])
+
+    print(
+        f"{label:>6}  query p50 {statistics.median(latencies) * 1000:7.1f} ms"
+        f"  embed {throughput:7.1f} docs/s"
+        f"  rerank({k}) p50 {statistics.median(rerank_latencies) * 1000:7.1f} ms"
+    )
+    return {"top_k": top_k, "rerank_top": rerank_top}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus")
+    parser.add_argument("--queries")
+    parser.add_argument("--embedding-model")
+    parser.add_argument("--reranker-model")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+
+    passages, queries, embedding_model, reranker_model = default_corpus()
+    if args.corpus:
+        passages = read_lines(args.corpus)
+    if args.queries:
+        queries = read_lines(args.queries)
+    embedding_model = args.embedding_model or embedding_model
+    reranker_model = args.reranker_model or reranker_model
+    k = min(args.k, len(passages))
+    print(f"{len(passages)} passages, {len(queries)} queries, k={k}")
+
+    results = {}
+    for label, quantize in (("fp32", False), ("int8", True)):
+        embeddings = load_embeddings(embedding_model, device="cpu", quantize=quantize)
+        reranker = load_reranker(reranker_model, device="cpu", quantize=quantize)
+        results[label] = bench(label, embeddings, reranker, passages, queries, k, args.batch_size)
+        del embeddings, reranker
+
+    overlap = [
+        len(set(a[:10]) & set(b[:10])) / len(a[:10])
+        for a, b in zip(results["fp32"]["top_k"], results["int8"]["top_k"])
+    ]
+    top1 = [a[0] == b[0] for a, b in zip(results["fp32"]["rerank_top"], results["int8"]["rerank_top"])]
+    top3 = [
+        len(set(a) & set(b)) / len(a)
+        for a, b in zip(results["fp32"]["rerank_top"], results["int8"]["rerank_top"])
+    ]
+    print(f"retrieval overlap@10 {statistics.mean(overlap):.3f}")
+    print(f"rerank top-1 agreement {statistics.mean(top1):.3f}  top-3 overlap {statistics.mean(top3):.3f}")
+
+
+if __name__ == "__main__":
+    main()
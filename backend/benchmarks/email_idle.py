@@ -0,0 +1,78 @@
+"""Email pickup latency against a local IMAP test server.
+
+Runs aioimaplib's in-memory IMAP server (IDLE capable, no TLS) and
+delivers --messages mails to --user, one every --interval seconds.
+Point the backend at it with
+
+    gmail_email = "support@test.local", gmail_password = "any"
+    gmail_imap_host = "127.0.0.1", gmail_imap_port = 1143, gmail_imap_ssl = false
+
+and enable Gmail. Each mail has a unique subject; the time until its
+ticket shows up in the ticket store (same TICKET_DB_PATH as the backend)
+is reported. Replies go out over SMTP and fail harmlessly here.
+
+    python -m benchmarks.email_idle --messages 20 --interval 2
+"""
+import os
+import sys
+import time
+import uuid
+import asyncio
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from aioimaplib.imap_testing_server import MockImapServer, Mail
+from app.services.metrics import LatencyTracker
+from app.services.ticket_store import ticket_store
+
+
+async def wait_for_ticket(subject: str, timeout: float) -> bool:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        entries, _ = await asyncio.to_thread(ticket_store.page, 1, q=subject)
+        if entries:
+            return True
+        await asyncio.sleep(0.05)
+    return False
+
+
+async def run(args):
+    server = MockImapServer(loop=asyncio.get_running_loop())
+    listener = await server.run_server(host="127.0.0.1", port=args.port)
+    print(f"IMAP test server on 127.0.0.1:{args.port}; waiting {args.startup}s for the backend to connect...")
+    await asyncio.sleep(args.startup)
+
+    latency = LatencyTracker()
+    missed = 0
+    for i in range(args.messages):
+        subject = f"Benchmark {i} {uuid.uuid4().hex[:8]}"
+        started = time.perf_counter()
+        server.receive(Mail.create([args.user], mail_from="customer@test.local", subject=subject, content=args.body))
+        if await wait_for_ticket(subject, args.timeout):
+            latency.record(time.perf_counter() - started)
+        else:
+            missed += 1
+        await asyncio.sleep(args.interval)
+
+    stats = latency.snapshot()
+    print(f"mail -> ticket   p50 {stats['p50_ms']:>8.1f} ms   p95 {stats['p95_ms']:>8.1f} ms   "
+          f"max {max(latency.samples, default=0) * 1000:.1f} ms   missed {missed}/{args.messages}")
+    listener.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=1143)
+    parser.add_argument("--user", default="support@test.local")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--interval", type=float, default=2.0)
+    parser.add_argument("--startup", type=float, default=15.0, help="seconds to wait for the backend to connect")
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds to wait for each ticket")
+    parser.add_argument("--body", default="Hello, my order has not arrived yet. Can you check the status?")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Ingestion embedding throughput: fixed 50-chunk batches vs token budget.
+
+The fixed strategy embeds chunks in file order, 50 at a time, as ingestion
+did before; the token-budget strategy sorts chunks by token length and
+packs them into batches of at most --budget padded tokens. Both report
+chunks/sec and the share of padded positions that carried no token.
+
+    python -m benchmarks.ingest_embedding --corpus chunks.txt --budget 16384
+
+Without --corpus a synthetic mix of short FAQ-style lines and long
+passages is used, which is close to a typical uploaded knowledge base.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.model_loader import load_embeddings
+from app.services.token_batching import AdaptiveTokenBudget, token_lengths
+
+WORDS = "order delivery refund account password payment invoice status tracking support warehouse address".split()
+
+
+def synthetic_corpus(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(count):
+        # Mostly short chunks with a long tail, like split FAQ pages and manuals.
+        words = rng.choice([8, 12, 20, 40]) if rng.random() < 0.7 else rng.randint(80, 200)
+        chunks.append(" ".join(rng.choice(WORDS) for _ in range(words)))
+    return chunks
+
+
+def read_lines(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def padding_ratio(batches: list, lengths: list) -> float:
+    tokens = sum(lengths[i] for batch in batches for i in batch)
+    padded = sum(len(batch) * max(lengths[i] for i in batch) for batch in batches)
+    return 1 - tokens / padded if padded else 0.0
+
+
+def fixed_batches(embeddings, texts: list, lengths: list, batch_size: int) -> dict:
+    batches = [list(range(i, min(i + batch_size, len(texts)))) for i in range(0, len(texts), batch_size)]
+    started = time.perf_counter()
+    for batch in batches:
+        embeddings.embed_documents([texts[i] for i in batch])
+    seconds = time.perf_counter() - started
+    return {"batches": len(batches), "chunks_per_second": len(texts) / seconds, "padding_ratio": padding_ratio(batches, lengths)}
+
+
+def budget_batches(embeddings, texts: list, lengths: list, budget: int, max_batch_size: int) -> dict:
+    adaptive = AdaptiveTokenBudget(budget, max_batch_size)
+    batches = adaptive.batches_for(lengths)
+    started = time.perf_counter()
+    for batch in batches:
+        adaptive.embed(embeddings, [texts[i] for i in batch], [lengths[i] for i in batch])
+    seconds = time.perf_counter() - started
+    return {
+        "batches": len(batches),
+        "chunks_per_second": len(texts) / seconds,
+        "padding_ratio": padding_ratio(batches, lengths),
+        "ooms": adaptive.ooms,
+        "final_budget": adaptive.budget,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", help="one chunk per line (default: synthetic)")
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--model", help="embedding model (default: embedding_model from config.json)")
+    parser.add_argument("--device")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--budget", type=int, default=16384)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    texts = read_lines(args.corpus) if args.corpus else synthetic_corpus(args.chunks)
+    model = args.model
+    if model is None:
+        with open(os.path.join(BACKEND_DIR, "config.json"), "r", encoding="utf-8") as f:
+            model = json.load(f)["embedding_model"]
+    embeddings = load_embeddings(model, args.device)
+    lengths = token_lengths(embeddings, texts)
+    print(f"{len(texts)} chunks, {sum(lengths)} tokens, longest {max(lengths)}")
+
+    embeddings.embed_documents(texts[:8])
+    results = {
+        f"fixed {args.batch_size}": fixed_batches(embeddings, texts, lengths, args.batch_size),
+        f"token budget {args.budget}": budget_batches(embeddings, texts, lengths, args.budget, args.max_batch_size),
+    }
+    for label, r in results.items():
+        extra = f"   ooms {r['ooms']}, final budget {r['final_budget']}" if "ooms" in r else ""
+        print(f"{label:<22} {r['chunks_per_second']:>8.1f} chunks/s   {r['batches']:>4} batches   padding {r['padding_ratio']:.1%}{extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Import time of the API module and time until the server is live and ready.
+
+Import time is measured in a fresh interpreter per run. Liveness and
+readiness are measured by starting uvicorn and polling /health/live and
+/health/ready until they return 200.
+
+    python -m benchmarks.startup --runs 5 --port 8765
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+import urllib.request
+import urllib.error
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_time() -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def status(url: str) -> int:
+    try:
+        with urllib.request.urlopen(url, timeout=1) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+    except OSError:
+        return 0
+
+
+def serve(port: int, timeout: float) -> tuple:
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    live = ready = None
+    try:
+        while time.perf_counter() - started < timeout:
+            if live is None and status(f"http://127.0.0.1:{port}/health/live") == 200:
+                live = time.perf_counter() - started
+            if live is not None and status(f"http://127.0.0.1:{port}/health/ready") == 200:
+                ready = time.perf_counter() - started
+                break
+            time.sleep(0.05)
+    finally:
+        proc.terminate()
+        proc.wait()
+    return live, ready
+
+
+def summary(values: list) -> str:
+    values = [v for v in values if v is not None]
+    if not values:
+        return "timed out"
+    return f"median {statistics.median(values):.2f}s  min {min(values):.2f}s  max {max(values):.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=300)
+    args = parser.parse_args()
+
+    imports = [import_time() for _ in range(args.runs)]
+    print(f"import main     {summary(imports)}")
+
+    lives, readies = [], []
+    for _ in range(args.runs):
+        live, ready = serve(args.port, args.timeout)
+        lives.append(live)
+        readies.append(ready)
+    print(f"time to live    {summary(lives)}")
+    print(f"time to ready   {summary(readies)}")
+
+
+if __name__ == "__main__":
+    main()
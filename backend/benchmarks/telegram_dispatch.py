@@ -0,0 +1,106 @@
+"""Telegram reply latency as the number of simultaneous chats grows.
+
+Each chat sends --messages messages a little apart; the handler stands in
+for classify -> retrieve -> generate with a random delay. The sequential
+run handles updates one at a time, as python-telegram-bot does by default;
+the dispatched run goes through ChatDispatcher with --concurrency slots.
+
+    python -m benchmarks.telegram_dispatch --chats 1 4 16 64 --concurrency 16
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.chat_dispatcher import ChatDispatcher
+from app.services.metrics import LatencyTracker
+
+
+def arrivals(chats: int, messages: int, gap: float, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    events = []
+    for chat in range(chats):
+        at = rng.random() * gap
+        for i in range(messages):
+            events.append((at, chat, f"message {i}"))
+            at += gap * (0.5 + rng.random())
+    return sorted(events)
+
+
+async def replay(events: list, submit):
+    started = time.perf_counter()
+    for at, chat, text in events:
+        delay = at - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await submit(chat, {"text": text, "received_at": time.perf_counter()})
+
+
+async def run_sequential(events: list, answer) -> LatencyTracker:
+    latency = LatencyTracker()
+    queue = asyncio.Queue()
+
+    async def consumer():
+        while True:
+            chat, item = await queue.get()
+            await answer()
+            latency.record(time.perf_counter() - item["received_at"])
+            queue.task_done()
+
+    worker = asyncio.create_task(consumer())
+    await replay(events, lambda chat, item: queue.put((chat, item)))
+    await queue.join()
+    worker.cancel()
+    return latency
+
+
+async def run_dispatched(events: list, answer, concurrency: int, backlog: int) -> tuple:
+    async def handler(chat, item):
+        await answer()
+
+    dispatcher = ChatDispatcher(handler, max_concurrency=concurrency, max_backlog=backlog,
+                                merge=lambda old, new: dict(old, text=old["text"] + "\n" + new["text"]))
+
+    async def submit(chat, item):
+        dispatcher.submit(chat, item)
+
+    await replay(events, submit)
+    while dispatcher.snapshot()["chats"]:
+        await asyncio.sleep(0.01)
+    return dispatcher.latency, dispatcher.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chats", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--messages", type=int, default=5)
+    parser.add_argument("--gap", type=float, default=2.0, help="seconds between messages in one chat")
+    parser.add_argument("--answer-ms", type=float, default=800, help="mean simulated answer time")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backlog", type=int, default=3)
+    parser.add_argument("--skip-sequential", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+
+    async def answer():
+        await asyncio.sleep(rng.expovariate(1000 / args.answer_ms))
+
+    for chats in args.chats:
+        events = arrivals(chats, args.messages, args.gap)
+        if not args.skip_sequential:
+            sequential = asyncio.run(run_sequential(events, answer)).snapshot()
+            print(f"{chats:>4} chats  sequential  p50 {sequential['p50_ms']:>8.0f} ms   p95 {sequential['p95_ms']:>8.0f} ms")
+        latency, stats = asyncio.run(run_dispatched(events, answer, args.concurrency, args.backlog))
+        dispatched = latency.snapshot()
+        print(f"{chats:>4} chats  dispatched  p50 {dispatched['p50_ms']:>8.0f} ms   p95 {dispatched['p95_ms']:>8.0f} ms"
+              f"   merged {stats['merged']}, dropped {stats['dropped']}")
+
+
+if __name__ == "__main__":
+    main()
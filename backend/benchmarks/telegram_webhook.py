@@ -0,0 +1,157 @@
+"""Telegram webhook round trip against a local fake Bot API.
+
+Starts a minimal Bot API server that answers getMe, setWebhook and
+sendMessage and records what the bot sends. Point the backend at it with
+
+    telegram_api_base_url = "http://127.0.0.1:8081/bot"
+    telegram_mode = "webhook"
+    telegram_webhook_url = "http://127.0.0.1:8000/api/v1/ingest/telegram/webhook"
+
+and enable the bot. Once the backend calls setWebhook, --updates text
+messages from --chats chats are posted to the webhook with the secret the
+backend registered. Reported: webhook acknowledgement latency and the time
+until the bot's reply reaches the fake API.
+
+    python -m benchmarks.telegram_webhook --port 8081 --updates 50 --chats 10
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import threading
+import httpx
+import uvicorn
+from fastapi import FastAPI, Request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.metrics import LatencyTracker
+
+QUESTIONS = [
+    "How do I reset my password?",
+    "My order has not arrived yet",
+    "Can I change the delivery address?",
+    "The app crashes when I open settings",
+]
+
+
+class FakeBotApi:
+    def __init__(self):
+        self.webhook = None
+        self.sent = []
+        self.message_id = 0
+        self.webhook_set = threading.Event()
+        self.app = FastAPI()
+        self.app.add_api_route("/bot{token}/{method}", self.call, methods=["GET", "POST"])
+
+    async def params(self, request: Request) -> dict:
+        if request.headers.get("content-type", "").startswith("application/json"):
+            return await request.json()
+        params = dict(request.query_params)
+        params.update(await request.form())
+        # Non-string parameters arrive JSON-encoded in form requests.
+        for key, value in params.items():
+            try:
+                params[key] = json.loads(value)
+            except (TypeError, ValueError):
+                pass
+        return params
+
+    async def call(self, token: str, method: str, request: Request):
+        params = await self.params(request)
+        if method == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}
+        elif method == "setWebhook":
+            self.webhook = params
+            self.webhook_set.set()
+            result = True
+        elif method in ("sendMessage", "editMessageText"):
+            self.message_id += 1
+            self.sent.append((time.perf_counter(), method, params))
+            result = {
+                "message_id": params.get("message_id") or self.message_id,
+                "date": int(time.time()),
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "text": str(params.get("text", "")),
+            }
+        elif method == "getUpdates":
+            await asyncio.sleep(1)
+            result = []
+        else:
+            result = True
+        return {"ok": True, "result": result}
+
+
+def update(update_id: int, chat_id: int, text: str) -> dict:
+    user = {"id": chat_id, "is_bot": False, "first_name": f"User {chat_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+async def fire(api: FakeBotApi, updates: int, chats: int, timeout: float):
+    url, secret = api.webhook["url"], api.webhook.get("secret_token")
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+    ack = LatencyTracker()
+    posted = {}
+
+    async with httpx.AsyncClient() as client:
+        async def post(i: int):
+            chat_id = 1000 + i % chats
+            started = time.perf_counter()
+            response = await client.post(url, json=update(i + 1, chat_id, QUESTIONS[i % len(QUESTIONS)]), headers=headers)
+            ack.record(time.perf_counter() - started)
+            response.raise_for_status()
+            posted.setdefault(chat_id, []).append(started)
+
+        await asyncio.gather(*(post(i) for i in range(updates)))
+
+    deadline = time.perf_counter() + timeout
+    while len(api.sent) < updates and time.perf_counter() < deadline:
+        await asyncio.sleep(0.1)
+
+    # Replies within a chat come back in order, so pair them up per chat.
+    reply = LatencyTracker()
+    replies = {}
+    for at, method, params in api.sent:
+        if method == "sendMessage":
+            replies.setdefault(int(params["chat_id"]), []).append(at)
+    for chat_id, sent_at in posted.items():
+        for started, at in zip(sorted(sent_at), replies.get(chat_id, [])):
+            reply.record(at - started)
+
+    a, r = ack.snapshot(), reply.snapshot()
+    print(f"webhook ack   p50 {a['p50_ms']:>8.1f} ms   p95 {a['p95_ms']:>8.1f} ms")
+    print(f"first reply   p50 {r['p50_ms']:>8.1f} ms   p95 {r['p95_ms']:>8.1f} ms   ({r['count']}/{updates} replied)")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--updates", type=int, default=50)
+    parser.add_argument("--chats", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    api = FakeBotApi()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=args.port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    print(f"Fake Bot API on http://127.0.0.1:{args.port}/bot, waiting for setWebhook...")
+    api.webhook_set.wait()
+    print(f"webhook registered: {api.webhook['url']}")
+    asyncio.run(fire(api, args.updates, args.chats, args.timeout))
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Ticket store write throughput with a large history.
+
+Fills a scratch database with --tickets synthetic entries, then measures
+single-entry appends (one transaction each, as ingest_log does), rating
+updates by id, pending-ticket lookups, and appends from several threads
+at once.
+
+    python -m benchmarks.ticket_store --tickets 1000000 --writes 5000 --threads 4
+"""
+import os
+import sys
+import time
+import uuid
+import random
+import argparse
+import tempfile
+import threading
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.services.ticket_store import TicketStore
+
+SOURCES = ["telegram", "email", "playground"]
+ACTIONS = ["auto_reply", "create_ticket", "spam"]
+
+
+def make_entry(i: int) -> dict:
+    action = random.choice(ACTIONS)
+    return {
+        "id": str(uuid.uuid4()),
+        "timestamp": time.time() - random.random() * 90 * 86400,
+        "text": f"Synthetic message {i}: my order has not arrived yet, can you check the status?",
+        "source": random.choice(SOURCES),
+        "contact_info": {"chat_id": i},
+        "translations": None,
+        "status": "pending" if action == "create_ticket" else "resolved",
+        "result": {"action": action, "response": "Thanks, we are looking into it.", "classification": {"type": "question"}},
+        "rating": None,
+    }
+
+
+def fill(store: TicketStore, count: int, batch: int = 10000) -> list:
+    ids = []
+    started = time.perf_counter()
+    for offset in range(0, count, batch):
+        entries = [make_entry(offset + i) for i in range(min(batch, count - offset))]
+        store.append_many(entries)
+        ids.extend(e["id"] for e in entries)
+    print(f"filled {count} tickets in {time.perf_counter() - started:.1f}s")
+    return ids
+
+
+def rate(label: str, n: int, seconds: float):
+    print(f"{label:<28} {n / seconds:>10.0f} ops/s   {seconds / n * 1e6:>8.1f} us/op")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickets", type=int, default=1_000_000)
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--db", help="database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    path = args.db or os.path.join(tempfile.mkdtemp(), "tickets.db")
+    store = TicketStore(path)
+    ids = fill(store, args.tickets)
+    print(f"database size {os.path.getsize(path) / 1e6:.0f} MB")
+
+    started = time.perf_counter()
+    for i in range(args.writes):
+        store.append(make_entry(args.tickets + i))
+    rate("append", args.writes, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for entry_id in random.sample(ids, args.writes):
+        store.update(entry_id, {"rating": random.choice(["like", "dislike"])})
+    rate("update rating by id", args.writes, time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(100):
+        store.list(limit=50, newest_first=True, status="pending")
+    rate("latest 50 pending", 100, time.perf_counter() - started)
+
+    per_thread = args.writes // args.threads
+
+    def writer(offset: int):
+        for i in range(per_thread):
+            store.append(make_entry(offset + i))
+
+    threads = [threading.Thread(target=writer, args=(args.tickets * 2 + t * per_thread,)) for t in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    rate(f"append, {args.threads} threads", per_thread * args.threads, time.perf_counter() - started)
+    print(f"total tickets {store.count()}")
+
+
+if __name__ == "__main__":
+    main()
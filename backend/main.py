@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.api import api_router
 from fastapi.middleware.cors import CORSMiddleware
@@ -20,8 +21,13 @@ app.include_router(api_router, prefix=settings.API_V1_STR)
 async def startup_event():
     from app.services.telegram_bot import telegram_service
     from app.services.email_bot import email_service
+    from app.services.ai_engine import ai_engine
     import asyncio
     
+    if settings.EAGER_MODEL_LOADING:
+        # warmup() logs a failure and /health/ready reports it; only retrieve it here.
+        warmup = asyncio.create_task(ai_engine.warmup())
+        warmup.add_done_callback(lambda task: task.cancelled() or task.exception())
     asyncio.create_task(telegram_service.start())
     asyncio.create_task(email_service.start_loop())
     print("Integration services startup initiated.")
@@ -29,3 +35,16 @@ async def startup_event():
 @app.get("/")
 def root():
     return {"message": "AI Help Desk API is running"}
+
+@app.get("/health/live")
+def health_live():
+    return {"status": "ok"}
+
+@app.get("/health/ready")
+def health_ready():
+    from app.services.ai_engine import ai_engine
+
+    if ai_engine.ready:
+        return {"status": "ready"}
+    state = "failed" if ai_engine.startup_error else "loading"
+    return JSONResponse(status_code=503, content={"status": state, "error": ai_engine.startup_error})
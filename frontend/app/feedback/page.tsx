@@ -6,6 +6,8 @@ import { MessageSquare, ThumbsUp, ThumbsDown, Plus, ArrowRight, Download } from
 import { useLanguage } from "@/context/LanguageContext";
 
 interface FeedbackLog {
+    id: string;
+    timestamp: number;
     text: string;
     source: string;
     result: any;
@@ -15,15 +17,27 @@ interface FeedbackLog {
 export default function FeedbackPage() {
     const { t } = useLanguage();
     const [logs, setLogs] = useState<FeedbackLog[]>([]);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const [filters, setFilters] = useState({ source: "", rating: "", q: "" });
     const [selectedLog, setSelectedLog] = useState<FeedbackLog | null>(null);
-    const [selectedIndex, setSelectedIndex] = useState<number>(-1);
     const [correction, setCorrection] = useState("");
 
+    const fetchPage = async (cursor: string | null) => {
+        try {
+            const res = await axios.get("http://localhost:8000/api/v1/admin/feedback", {
+                params: { ...filters, cursor: cursor || undefined, limit: 50 }
+            });
+            setLogs(prev => cursor ? [...prev, ...res.data.items] : res.data.items);
+            setNextCursor(res.data.next_cursor);
+        } catch (err) {
+            console.error(err);
+        }
+    };
+
     useEffect(() => {
-        axios.get("http://localhost:8000/api/v1/admin/feedback")
-            .then(res => setLogs(res.data.reverse()))
-            .catch(err => console.error(err));
-    }, []);
+        const timeout = setTimeout(() => fetchPage(null), 300);
+        return () => clearTimeout(timeout);
+    }, [filters]);
 
     const addToKnowledgeBase = async () => {
         if (!selectedLog || !correction) return;
@@ -41,16 +55,12 @@ export default function FeedbackPage() {
         }
     };
 
-    const handleRate = async (index: number, rating: string) => {
-        const realIndex = logs.length - 1 - index;
-
+    const handleRate = async (id: string, rating: string) => {
         try {
-            await axios.post(`http://localhost:8000/api/v1/admin/feedback/${realIndex}/rate`, { rating });
-            const newLogs = [...logs];
-            newLogs[index].rating = rating;
-            setLogs(newLogs);
-            if (selectedLog === logs[index]) {
-                setSelectedLog({ ...logs[index], rating });
+            await axios.post(`http://localhost:8000/api/v1/admin/feedback/${id}/rate`, { rating });
+            setLogs(logs.map(log => log.id === id ? { ...log, rating } : log));
+            if (selectedLog?.id === id) {
+                setSelectedLog({ ...selectedLog, rating });
             }
         } catch (err) {
             console.error(err);
@@ -78,12 +88,40 @@ export default function FeedbackPage() {
             <div className="flex gap-6 h-[calc(100vh-10rem)]">
                 <div className="w-1/2 flex flex-col rounded-xl border border-gray-800 bg-gray-950 p-4">
                     <h2 className="mb-4 text-xl font-semibold text-white">{t.recentInteractions}</h2>
+                    <div className="mb-4 flex gap-2">
+                        <input
+                            value={filters.q}
+                            onChange={(e) => setFilters({ ...filters, q: e.target.value })}
+                            placeholder={t.searchInteractions}
+                            className="flex-1 rounded-lg border border-gray-800 bg-gray-900 px-3 py-2 text-sm text-white outline-none focus:border-blue-600"
+                        />
+                        <select
+                            value={filters.source}
+                            onChange={(e) => setFilters({ ...filters, source: e.target.value })}
+                            className="rounded-lg border border-gray-800 bg-gray-900 px-2 py-2 text-sm text-white"
+                        >
+                            <option value="">{t.allSources}</option>
+                            <option value="telegram">telegram</option>
+                            <option value="email">email</option>
+                            <option value="playground">playground</option>
+                        </select>
+                        <select
+                            value={filters.rating}
+                            onChange={(e) => setFilters({ ...filters, rating: e.target.value })}
+                            className="rounded-lg border border-gray-800 bg-gray-900 px-2 py-2 text-sm text-white"
+                        >
+                            <option value="">{t.allRatings}</option>
+                            <option value="like">like</option>
+                            <option value="dislike">dislike</option>
+                            <option value="unrated">{t.unrated}</option>
+                        </select>
+                    </div>
                     <div className="flex-1 overflow-y-auto space-y-3 pr-2">
-                        {logs.map((log, idx) => (
+                        {logs.map((log) => (
                             <div
-                                key={idx}
-                                onClick={() => { setSelectedLog(log); setSelectedIndex(idx); setCorrection(""); }}
-                                className={`cursor-pointer rounded-lg border p-4 transition-colors ${selectedLog === log
+                                key={log.id}
+                                onClick={() => { setSelectedLog(log); setCorrection(""); }}
+                                className={`cursor-pointer rounded-lg border p-4 transition-colors ${selectedLog?.id === log.id
                                     ? "border-blue-500 bg-gray-800"
                                     : "border-gray-800 bg-gray-800 hover:border-gray-600"
                                     }`}
@@ -109,6 +147,14 @@ export default function FeedbackPage() {
                                 )}
                             </div>
                         ))}
+                        {nextCursor && (
+                            <button
+                                onClick={() => fetchPage(nextCursor)}
+                                className="w-full rounded-lg border border-gray-800 bg-gray-900 py-2 text-sm text-gray-300 hover:bg-gray-800"
+                            >
+                                {t.loadMore}
+                            </button>
+                        )}
                     </div>
                 </div>
 
@@ -119,13 +165,13 @@ export default function FeedbackPage() {
                                 <h2 className="text-xl font-semibold text-white">{t.reviewCorrect}</h2>
                                 <div className="flex gap-2">
                                     <button
-                                        onClick={(e) => { e.stopPropagation(); handleRate(selectedIndex, "like"); }}
+                                        onClick={(e) => { e.stopPropagation(); handleRate(selectedLog.id, "like"); }}
                                         className={`p-2 rounded hover:bg-gray-800 ${selectedLog.rating === "like" ? "text-green-400" : "text-gray-400"}`}
                                     >
                                         <ThumbsUp className="h-5 w-5" />
                                     </button>
                                     <button
-                                        onClick={(e) => { e.stopPropagation(); handleRate(selectedIndex, "dislike"); }}
+                                        onClick={(e) => { e.stopPropagation(); handleRate(selectedLog.id, "dislike"); }}
                                         className={`p-2 rounded hover:bg-gray-800 ${selectedLog.rating === "dislike" ? "text-red-400" : "text-gray-400"}`}
                                     >
                                         <ThumbsDown className="h-5 w-5" />
@@ -10,6 +10,8 @@ export default function Integrations() {
     const [config, setConfig] = useState({
         telegram_token: "",
         telegram_enabled: false,
+        telegram_mode: "polling",
+        telegram_webhook_url: "",
         gmail_email: "",
         gmail_password: "",
         gmail_enabled: false,
@@ -20,17 +22,17 @@ export default function Integrations() {
     useEffect(() => {
         axios.get("http://localhost:8000/api/v1/admin/settings")
             .then(res => {
-                const { telegram_token, telegram_enabled, gmail_email, gmail_password, gmail_enabled } = res.data;
-                setConfig({ telegram_token, telegram_enabled, gmail_email, gmail_password, gmail_enabled });
+                const { telegram_token, telegram_enabled, telegram_mode, telegram_webhook_url, gmail_email, gmail_password, gmail_enabled } = res.data;
+                setConfig({ telegram_token, telegram_enabled, telegram_mode, telegram_webhook_url, gmail_email, gmail_password, gmail_enabled });
             })
             .catch(err => console.error("Failed to load settings", err));
     }, []);
 
-    const handleChange = (e: React.ChangeEvent<HTMLInputElement>) => {
-        const { name, value, type, checked } = e.target;
+    const handleChange = (e: React.ChangeEvent<HTMLInputElement | HTMLSelectElement>) => {
+        const { name, value, type } = e.target;
         setConfig(prev => ({
             ...prev,
-            [name]: type === "checkbox" ? checked : value
+            [name]: type === "checkbox" ? (e.target as HTMLInputElement).checked : value
         }));
     };
 
@@ -89,6 +91,31 @@ export default function Integrations() {
                             className="w-full rounded-lg border border-gray-800 bg-gray-800 p-2.5 text-white outline-none focus:border-blue-600"
                         />
                     </div>
+                    <div>
+                        <label className="block text-sm font-medium text-gray-400 mb-1">{t.updateMode}</label>
+                        <select
+                            name="telegram_mode"
+                            value={config.telegram_mode || "polling"}
+                            onChange={handleChange}
+                            className="w-full rounded-lg border border-gray-800 bg-gray-800 p-2.5 text-white outline-none focus:border-blue-600"
+                        >
+                            <option value="polling">{t.polling}</option>
+                            <option value="webhook">{t.webhook}</option>
+                        </select>
+                    </div>
+                    {config.telegram_mode === "webhook" && (
+                        <div>
+                            <label className="block text-sm font-medium text-gray-400 mb-1">{t.webhookUrl}</label>
+                            <input
+                                type="text"
+                                name="telegram_webhook_url"
+                                value={config.telegram_webhook_url || ""}
+                                onChange={handleChange}
+                                placeholder="https://example.com/api/v1/ingest/telegram/webhook"
+                                className="w-full rounded-lg border border-gray-800 bg-gray-800 p-2.5 text-white outline-none focus:border-blue-600"
+                            />
+                        </div>
+                    )}
                 </div>
 
                 <div className="rounded-xl border border-gray-800 bg-gray-950 p-6 space-y-4">
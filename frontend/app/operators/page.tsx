@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import axios from "axios";
 import { Send, CheckCircle, RefreshCcw, MessageCircle, Mail, Clock, AlertTriangle } from "lucide-react";
 
@@ -25,17 +25,45 @@ export default function OperatorsPage() {
     const [replyText, setReplyText] = useState("");
     const [selectedTicket, setSelectedTicket] = useState<Ticket | null>(null);
     const [loading, setLoading] = useState(false);
+    const [nextCursor, setNextCursor] = useState<string | null>(null);
+    const pagesLoaded = useRef(1);
 
+    const fetchPage = async (cursor: string | null) => {
+        const res = await axios.get("http://localhost:8000/api/v1/admin/operator/tickets", {
+            params: { cursor: cursor || undefined, limit: 100 }
+        });
+        return res.data;
+    };
+
+    // Polling reloads every page loaded so far, so tickets from "load more" stay listed.
     const fetchTickets = async () => {
         try {
-            const res = await axios.get("http://localhost:8000/api/v1/admin/operator/tickets");
-            setTickets(res.data);
-            if (res.data.length > 0 && !selectedTicket) {
-                setSelectedTicket(res.data[0]);
+            let items: Ticket[] = [];
+            let cursor: string | null = null;
+            for (let page = 0; page < pagesLoaded.current; page++) {
+                const data = await fetchPage(cursor);
+                items = [...items, ...data.items];
+                cursor = data.next_cursor;
+                if (!cursor) break;
+            }
+            setTickets(items);
+            setNextCursor(cursor);
+            if (items.length > 0 && !selectedTicket) {
+                setSelectedTicket(items[0]);
             }
         } catch (e) { console.error(e); }
     };
 
+    const loadMore = async () => {
+        if (!nextCursor) return;
+        try {
+            const data = await fetchPage(nextCursor);
+            pagesLoaded.current += 1;
+            setTickets(prev => [...prev, ...data.items]);
+            setNextCursor(data.next_cursor);
+        } catch (e) { console.error(e); }
+    };
+
     useEffect(() => {
         fetchTickets();
         const interval = setInterval(fetchTickets, 5000); // Poll every 5s
@@ -117,6 +145,14 @@ export default function OperatorsPage() {
                                 <p className="text-sm text-gray-300 line-clamp-2 font-medium">{t.text}</p>
                             </div>
                         ))}
+                        {nextCursor && (
+                            <button
+                                onClick={loadMore}
+                                className="w-full rounded-lg border border-gray-800 bg-gray-900 py-2 text-sm text-gray-300 hover:bg-gray-800"
+                            >
+                                {t.loadMore}
+                            </button>
+                        )}
                     </div>
                 </div>
 
@@ -13,7 +13,7 @@ export default function RagControl() {
     const [uploading, setUploading] = useState(false);
     const [existingDocs, setExistingDocs] = useState<string[]>([]);
     const [loadingDocs, setLoadingDocs] = useState(false);
-    const [processing, setProcessing] = useState(false);
+    const [jobId, setJobId] = useState<string | null>(null);
 
     useEffect(() => {
         fetchDocuments();
@@ -45,17 +45,13 @@ export default function RagControl() {
         files.forEach(f => formData.append('files', f));
 
         try {
-            await axios.post('http://localhost:8000/api/v1/admin/upload-document', formData, {
+            const res = await axios.post('http://localhost:8000/api/v1/admin/upload-document', formData, {
                 headers: {
                     'Content-Type': 'multipart/form-data'
                 }
             });
             setFiles([]);
-            setProcessing(true);
-            setTimeout(() => {
-                setProcessing(false);
-                fetchDocuments();
-            }, 3000);
+            setJobId(res.data.job_id);
         } catch (err) {
             console.error(err);
             alert("Upload failed.");
@@ -88,7 +84,7 @@ export default function RagControl() {
                 </button>
             </div>
 
-            {processing && <ProcessingStatus />}
+            {jobId && <ProcessingStatus jobId={jobId} onDone={() => { setJobId(null); fetchDocuments(); }} />}
 
             <div
                 onDrop={handleDrop}
@@ -42,31 +42,66 @@ export default function Playground() {
         setLoading(true);
 
         try {
-            const res = await axios.post("http://localhost:8000/api/v1/ingest/message", {
-                text: input,
-                source: "playground"
+            const res = await fetch("http://localhost:8000/api/v1/ingest/message/stream", {
+                method: "POST",
+                headers: { "Content-Type": "application/json" },
+                body: JSON.stringify({ text: input, source: "playground" })
             });
-            fetchStats();
-
-            const data = res.data;
-            let content = "";
-            let sources: string[] = [];
-
-            if (data.action === "auto_reply") {
-                content = data.response;
-                sources = data.sources || [];
-            } else if (data.action === "escalate") {
-                content = `[ESCALATED] Ticket created. Reason: ${data.classification?.type || "Complex issue"}. Priority: ${data.classification?.priority}`;
-            } else if (data.action === "ignore") {
-                content = "[IGNORED] Message classified as spam.";
-            }
+            if (!res.ok || !res.body) throw new Error(`HTTP ${res.status}`);
 
-            const botMsg = {
-                role: "assistant",
-                content: content,
-                sources: sources
+            let botIndex = -1;
+            const showReply = (content: string, sources?: string[]) => {
+                setLoading(false);
+                setMessages(prev => {
+                    const next = [...prev];
+                    if (botIndex === -1) {
+                        botIndex = next.length;
+                        next.push({ role: "assistant", content, sources });
+                    } else {
+                        next[botIndex] = { ...next[botIndex], content, ...(sources ? { sources } : {}) };
+                    }
+                    return next;
+                });
             };
-            setMessages(prev => [...prev, botMsg]);
+
+            const reader = res.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = "";
+            let answer = "";
+
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                buffer += decoder.decode(value, { stream: true });
+
+                const events = buffer.split("\n\n");
+                buffer = events.pop() || "";
+                for (const raw of events) {
+                    const event = raw.match(/^event: (.*)$/m)?.[1];
+                    const dataLine = raw.match(/^data: (.*)$/m)?.[1];
+                    if (!event || dataLine === undefined) continue;
+                    const data = JSON.parse(dataLine);
+
+                    if (event === "token") {
+                        answer += data;
+                        showReply(answer);
+                    } else if (event === "answer") {
+                        answer = data;
+                        showReply(answer);
+                    } else if (event === "done") {
+                        if (data.action === "auto_reply") {
+                            showReply(data.response, data.sources || []);
+                        } else if (data.action === "escalate") {
+                            showReply(`[ESCALATED] Ticket created. Reason: ${data.classification?.type || "Complex issue"}. Priority: ${data.classification?.priority}`);
+                        } else if (data.action === "ignore") {
+                            showReply("[IGNORED] Message classified as spam.");
+                        }
+                    } else if (event === "error") {
+                        throw new Error(data.detail);
+                    }
+                }
+            }
+            fetchStats();
         } catch (err) {
             console.error(err);
             setMessages(prev => [...prev, { role: "assistant", content: "Error connecting to AI Server." }]);
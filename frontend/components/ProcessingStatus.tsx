@@ -1,8 +1,37 @@
 "use client";
 
+import { useEffect, useState } from "react";
 import { Loader2 } from "lucide-react";
 
-export default function ProcessingStatus() {
+interface JobProgress {
+    state: string;
+    files: { [id: string]: { filename: string; state: string; error: string | null } };
+    chunks: { planned: number; to_embed: number; embedded: number; written: number; reused: number };
+    chunks_per_second: number;
+    eta_seconds: number | null;
+}
+
+export default function ProcessingStatus({ jobId, onDone }: { jobId: string; onDone?: () => void }) {
+    const [progress, setProgress] = useState<JobProgress | null>(null);
+
+    useEffect(() => {
+        const source = new EventSource(`http://localhost:8000/api/v1/admin/ingest-jobs/${jobId}/events`);
+        source.addEventListener("progress", (e) => setProgress(JSON.parse((e as MessageEvent).data)));
+        source.addEventListener("done", () => {
+            source.close();
+            onDone?.();
+        });
+        // Lost connection or an evicted job: stop the spinner and let the page refresh.
+        source.onerror = () => {
+            source.close();
+            onDone?.();
+        };
+        return () => source.close();
+    }, [jobId]);
+
+    const files = progress ? Object.values(progress.files) : [];
+    const filesDone = files.filter(f => ["done", "skipped", "failed"].includes(f.state)).length;
+
     return (
         <div className="flex items-center gap-3 rounded-lg border border-blue-500/30 bg-blue-500/10 p-4 text-blue-400 animate-fade-in">
             <div className="relative">
@@ -10,8 +39,12 @@ export default function ProcessingStatus() {
                 <div className="absolute inset-0 animate-ping rounded-full bg-blue-500 opacity-20"></div>
             </div>
             <div className="flex flex-col">
-                <span className="text-sm font-medium">Processing documents...</span>
-                <span className="text-xs opacity-70">Generating embeddings & chunks</span>
+                <span className="text-sm font-medium">Processing documents... {progress && `${filesDone}/${files.length} files`}</span>
+                <span className="text-xs opacity-70">
+                    {progress
+                        ? `${progress.chunks.written}/${progress.chunks.to_embed} chunks embedded (${progress.chunks.reused} reused) · ${progress.chunks_per_second} chunks/s${progress.eta_seconds !== null ? ` · ETA ${Math.ceil(progress.eta_seconds)}s` : ""}`
+                        : "Generating embeddings & chunks"}
+                </span>
             </div>
         </div>
     );
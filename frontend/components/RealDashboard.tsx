@@ -4,8 +4,11 @@ import axios from "axios";
 import StatCard from "./StatCard";
 import { useLanguage } from "@/context/LanguageContext";
 
+const RANGES = ["1h", "24h", "7d", "30d", "all"];
+
 export default function RealDashboard() {
     const { t } = useLanguage();
+    const [range, setRange] = useState("all");
     const [stats, setStats] = useState({
         auto_resolution_rate: 0,
         average_response_time: "0s",
@@ -15,13 +18,24 @@ export default function RealDashboard() {
     });
 
     useEffect(() => {
-        axios.get("http://localhost:8000/api/v1/admin/analytics")
+        axios.get("http://localhost:8000/api/v1/admin/analytics", { params: { range } })
             .then(res => setStats(res.data))
             .catch(console.error);
-    }, []);
+    }, [range]);
 
     return (
         <div className="space-y-6">
+            <div className="flex justify-end gap-2">
+                {RANGES.map(r => (
+                    <button
+                        key={r}
+                        onClick={() => setRange(r)}
+                        className={`rounded-lg px-3 py-1 text-sm ${range === r ? "bg-blue-600 text-white" : "bg-gray-900 text-gray-400 hover:text-white"}`}
+                    >
+                        {r}
+                    </button>
+                ))}
+            </div>
             <div className="grid grid-cols-1 gap-6 md:grid-cols-2 lg:grid-cols-4">
                 <StatCard
                     title={t.autoResolutionRate}
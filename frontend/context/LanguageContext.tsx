@@ -103,12 +103,21 @@ const translations: Translations = {
         writeIdealResponse: "Write the ideal response here to add it to the Few-Shot examples...",
         addToKnowledgeBase: "Add to Knowledge Base",
         selectInteraction: "Select an interaction from the left to review it.",
+        searchInteractions: "Search messages...",
+        allSources: "All sources",
+        allRatings: "All ratings",
+        unrated: "Unrated",
+        loadMore: "Load more",
 
         // Integrations
         connectChannels: "Connect your AI assistant to external communication channels.",
         telegramBot: "Telegram Bot",
         enterBotToken: "Enter your Bot Token from @BotFather. The bot will reply to messages using the configured AI persona.",
         botToken: "Bot Token",
+        updateMode: "Update Mode",
+        polling: "Polling",
+        webhook: "Webhook",
+        webhookUrl: "Webhook URL",
         gmail: "Gmail",
         connectGmail: "Connect to Gmail to auto-reply to emails. Use an App Password, not your regular password.",
         emailAddress: "Email Address",
@@ -213,12 +222,21 @@ const translations: Translations = {
         writeIdealResponse: "Напишите идеальный ответ здесь, чтобы добавить его в примеры...",
         addToKnowledgeBase: "Добавить в Базу Знаний",
         selectInteraction: "Выберите диалог слева для просмотра.",
+        searchInteractions: "Поиск по сообщениям...",
+        allSources: "Все источники",
+        allRatings: "Все оценки",
+        unrated: "Без оценки",
+        loadMore: "Загрузить ещё",
 
         // Integrations
         connectChannels: "Подключите вашего ИИ-ассистента к внешним каналам связи.",
         telegramBot: "Telegram Бот",
         enterBotToken: "Введите токен бота от @BotFather. Бот будет отвечать, используя настроенную персону ИИ.",
         botToken: "Токен Бота",
+        updateMode: "Режим получения обновлений",
+        polling: "Опрос (polling)",
+        webhook: "Вебхук",
+        webhookUrl: "URL вебхука",
         gmail: "Gmail",
         connectGmail: "Подключите Gmail для автоответов. Используйте Пароль Приложения, а не обычный пароль.",
         emailAddress: "Email адрес",
@@ -322,12 +340,21 @@ const translations: Translations = {
         writeIdealResponse: "Few-Shot мысалдарына қосу үшін идеалды жауапты осында жазыңыз...",
         addToKnowledgeBase: "Білім базасына қосу",
         selectInteraction: "Қарау үшін сол жақтан диалогты таңдаңыз.",
+        searchInteractions: "Хабарламалардан іздеу...",
+        allSources: "Барлық көздер",
+        allRatings: "Барлық бағалар",
+        unrated: "Бағаланбаған",
+        loadMore: "Тағы жүктеу",
 
         // Integrations
         connectChannels: "AI көмекшісін сыртқы байланыс арналарына қосыңыз.",
         telegramBot: "Telegram Бот",
         enterBotToken: "@BotFather-дан бот токенін енгізіңіз. Бот конфигурацияланған AI тұлғасын пайдаланып жауап береді.",
         botToken: "Бот Токені",
+        updateMode: "Жаңартуларды алу режимі",
+        polling: "Сұрау (polling)",
+        webhook: "Вебхук",
+        webhookUrl: "Вебхук URL",
         gmail: "Gmail",
         connectGmail: "Электрондық хаттарға автоматты түрде жауап беру үшін Gmail-ге қосылыңыз. Қолданба құпия сөзін пайдаланыңыз.",
         emailAddress: "Email мекенжайы",